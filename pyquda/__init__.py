@@ -17,6 +17,8 @@ _MPI_SIZE: int = 1
 _MPI_RANK: int = 0
 _GRID_SIZE: List[int] = [1, 1, 1, 1]
 _GRID_COORD: List[int] = [0, 0, 0, 0]
+_GROUP_ID: int = 0
+_GROUP_NUM: int = 1
 _GPUID: int = 0
 _CUDA_BACKEND: Literal["cupy", "torch"] = "cupy"
 _COMPUTE_CAPABILITY: _ComputeCapability = _ComputeCapability(0, 0)
@@ -32,13 +34,15 @@ def getCoordFromRank(rank: int, grid: List[int]) -> List[int]:
     return [rank // t // z // y, rank // t // z % y, rank // t % z, rank % t]
 
 
-def init(grid_size: List[int] = None, backend: Literal["cupy", "torch"] = "cupy"):
+def init(grid_size: List[int] = None, backend: Literal["cupy", "torch"] = "cupy", split: bool = False):
     """
     Initialize MPI along with the QUDA library.
 
     If grid_size is None, MPI will not applied.
+    If split is True, MPI.COMM_WORLD is partitioned into equal groups of grid_size, and each group runs its own
+    QUDA instance on a sub-communicator. getMPIComm() then returns the communicator of the group.
     """
-    global _MPI_COMM, _MPI_SIZE, _MPI_RANK, _GRID_SIZE, _GRID_COORD
+    global _MPI_COMM, _MPI_SIZE, _MPI_RANK, _GRID_SIZE, _GRID_COORD, _GROUP_ID, _GROUP_NUM
     if _MPI_COMM is None:
         import atexit
         from os import getenv
@@ -56,7 +60,16 @@ def init(grid_size: List[int] = None, backend: Literal["cupy", "torch"] = "cupy"
         gpuid = 0
         Gx, Gy, Gz, Gt = grid_size if grid_size is not None else [1, 1, 1, 1]
 
-        _MPI_COMM = MPI.COMM_WORLD
+        world_size = MPI.COMM_WORLD.Get_size()
+        world_rank = MPI.COMM_WORLD.Get_rank()
+        if split:
+            if world_size % (Gx * Gy * Gz * Gt) != 0:
+                raise ValueError(f"{world_size} processes cannot be split into groups of grid {[Gx, Gy, Gz, Gt]}")
+            _GROUP_NUM = world_size // (Gx * Gy * Gz * Gt)
+            _GROUP_ID = world_rank // (Gx * Gy * Gz * Gt)
+            _MPI_COMM = MPI.COMM_WORLD.Split(_GROUP_ID, world_rank)
+        else:
+            _MPI_COMM = MPI.COMM_WORLD
         _MPI_SIZE = _MPI_COMM.Get_size()
         _MPI_RANK = _MPI_COMM.Get_rank()
         _GRID_SIZE = [Gx, Gy, Gz, Gt]
@@ -65,9 +78,10 @@ def init(grid_size: List[int] = None, backend: Literal["cupy", "torch"] = "cupy"
 
         global _GPUID, _CUDA_BACKEND, _COMPUTE_CAPABILITY
 
+        # GPUs are shared by all groups on the same node.
         hostname = gethostname()
-        hostname_recv_buf = _MPI_COMM.allgather(hostname)
-        for i in range(_MPI_RANK):
+        hostname_recv_buf = MPI.COMM_WORLD.allgather(hostname)
+        for i in range(world_rank):
             if hostname == hostname_recv_buf[i]:
                 gpuid += 1
 
@@ -96,6 +110,8 @@ def init(grid_size: List[int] = None, backend: Literal["cupy", "torch"] = "cupy"
             cc = cuda.get_device_capability(gpuid)
             _COMPUTE_CAPABILITY = _ComputeCapability(cc[0], cc[1])
 
+        if split:
+            quda.setMPICommHandleQuda(MPI._addressof(_MPI_COMM))
         quda.initCommsGridQuda(4, [Gx, Gy, Gz, Gt])
         quda.initQuda(gpuid)
         atexit.register(quda.endQuda)
@@ -123,6 +139,14 @@ def getGridCoord():
     return _GRID_COORD
 
 
+def getGroupID():
+    return _GROUP_ID
+
+
+def getGroupNum():
+    return _GROUP_NUM
+
+
 def setGPUID(gpuid: int):
     global _GPUID
     _GPUID = gpuid
@@ -1,8 +1,10 @@
+import atexit
 from typing import List, Literal, Union
 
 import numpy
+from mpi4py import MPI
 
-from . import pyquda as quda, enum_quda, getMPIComm, getMPISize, getMPIRank, getGridSize, getCoordFromRank
+from . import pyquda as quda, enum_quda, getMPIComm, getMPIRank, getGridSize, getCoordFromRank, getRankFromCoord
 from .field import (
     Ns,
     Nc,
@@ -17,9 +19,13 @@ from .field import (
     cb2,
 )
 from .dirac import Dirac
+from .dirac.general import PrecisionProfile
+from .dirac.resident import getResident
 from .utils.source import source
 
 _DEFAULT_LATTICE: LatticeInfo = None
+_GATHER_COMM = {}
+_GATHER_COMM_PARENT: MPI.Comm = None
 
 
 def setDefaultLattice(latt_size: List[int], t_boundary: Literal[1, -1] = -1, anisotropy: float = 1.0):
@@ -68,8 +74,10 @@ def smear(latt_size: List[int], gauge: LatticeGauge, nstep: int, rho: float):
     dslash.gauge_param.reconstruct = enum_quda.QudaReconstructType.QUDA_RECONSTRUCT_NO
     dslash.loadGauge(gauge)
     quda.performGaugeSmearQuda(smear_param, obs_param)
+    getResident().invalidate("smeared")
     dslash.gauge_param.type = enum_quda.QudaLinkType.QUDA_SMEARED_LINKS
     quda.saveGaugeQuda(gauge.data_ptrs, dslash.gauge_param)
+    gauge.touch()
 
 
 def smear4(latt_size: List[int], gauge: LatticeGauge, nstep: int, rho: float):
@@ -85,8 +93,10 @@ def smear4(latt_size: List[int], gauge: LatticeGauge, nstep: int, rho: float):
     dslash.gauge_param.reconstruct = enum_quda.QudaReconstructType.QUDA_RECONSTRUCT_NO
     dslash.loadGauge(gauge)
     quda.performGaugeSmearQuda(smear_param, obs_param)
+    getResident().invalidate("smeared")
     dslash.gauge_param.type = enum_quda.QudaLinkType.QUDA_SMEARED_LINKS
     quda.saveGaugeQuda(gauge.data_ptrs, dslash.gauge_param)
+    gauge.touch()
 
 
 def invert(
@@ -152,46 +162,215 @@ def invert12(b12: LatticePropagator, dslash: Dirac):
     return x12
 
 
-def gatherLattice(data: numpy.ndarray, axes: List[int], reduce_op: Literal["sum", "mean"] = "sum", root: int = 0):
-    Gx, Gy, Gz, Gt = getGridSize()
+def _getLatticeBlockType(dtype: numpy.dtype, global_shape: List[int], local_shape: List[int]):
+    etype = MPI.BYTE.Create_contiguous(dtype.itemsize).Commit()
+    subarray = etype.Create_subarray(global_shape, local_shape, [0] * len(global_shape))
+    btype = subarray.Create_resized(0, dtype.itemsize).Commit()
+    subarray.Free()
+    return etype, btype
+
+
+def freeGatherComm():
+    """
+    Free the sub-communicators cached by `gatherLattice` and `igatherLattice`. This is collective and called at
+    exit, and the pending nonblocking gathers still complete.
+    """
+    global _GATHER_COMM_PARENT
+    if not MPI.Is_finalized():
+        for reduce_comm, gather_comm in _GATHER_COMM.values():
+            reduce_comm.Free()
+            if gather_comm != MPI.COMM_NULL:
+                gather_comm.Free()
+    _GATHER_COMM.clear()
+    _GATHER_COMM_PARENT = None
+
+
+atexit.register(freeGatherComm)
+
+
+def _gatherLatticeSetup(data: numpy.ndarray, axes: List[int], root: int):
+    comm = getMPIComm()
+    rank = getMPIRank()
+    grid_size = getGridSize()
     Lt, Lz, Ly, Lx = [data.shape[axis] if axis >= 0 else 1 for axis in axes]
     keep = tuple([axis for axis in axes if axis >= 0])
     keep = (0, -1) if keep == () else keep
-    reduce_axis = tuple([keep[0] + d for d in range(4) if axes[d] == -1])
     prefix = data.shape[: keep[0]]
     suffix = data.shape[keep[-1] + 1 :]
-    prefix_size = numpy.prod(prefix)
-    suffix_size = numpy.prod(suffix)
-
-    if getMPIRank() == root:
-        sendbuf = data.reshape(-1)
-        recvbuf = numpy.zeros((getMPISize(), data.size), data.dtype)
-        getMPIComm().Gatherv(sendbuf, recvbuf, root)
-
-        data = numpy.zeros_like(recvbuf).reshape(prefix_size, Gt * Lt, Gz * Lz, Gy * Ly, Gx * Lx, suffix_size)
-        for rank in range(getMPISize()):
-            gx, gy, gz, gt = getCoordFromRank(rank, getGridSize())
-            data[
-                :,
-                gt * Lt : (gt + 1) * Lt,
-                gz * Lz : (gz + 1) * Lz,
-                gy * Ly : (gy + 1) * Ly,
-                gx * Lx : (gx + 1) * Lx,
-                :,
-            ] = recvbuf[rank].reshape(prefix_size, Lt, Lz, Ly, Lx, suffix_size)
-        data = data.reshape(*prefix, Gt * Lt, Gz * Lz, Gy * Ly, Gx * Lx, *suffix)
-
-        if reduce_op.lower() == "sum":
-            return data.sum(reduce_axis)
-        elif reduce_op.lower() == "mean":
-            return data.mean(reduce_axis)
-        else:
-            raise NotImplementedError(f"core.gather doesn't support reduce operator reduce_op={reduce_op}")
+    prefix_size = int(numpy.prod(prefix))
+    suffix_size = int(numpy.prod(suffix))
+
+    # Grid coordinates are ordered as t, z, y, x to match axes.
+    Gt, Gz, Gy, Gx = [G if axis >= 0 else 1 for G, axis in zip(grid_size[::-1], axes)]
+    coord = getCoordFromRank(rank, grid_size)[::-1]
+    root_coord = getCoordFromRank(root, grid_size)[::-1]
+    leader = getRankFromCoord(
+        [coord[3 - d] if axes[3 - d] >= 0 else root_coord[3 - d] for d in range(4)],
+        grid_size,
+    )
+
+    # The communicators are cached as splitting is collective and a pending Igatherv needs its communicator alive.
+    # They are split from the communicator of the current grid, so the cache of an older one is dropped.
+    global _GATHER_COMM_PARENT
+    if comm is not _GATHER_COMM_PARENT:
+        freeGatherComm()
+        _GATHER_COMM_PARENT = comm
+    key = (tuple(grid_size), tuple(axis < 0 for axis in axes), root)
+    if key not in _GATHER_COMM:
+        _GATHER_COMM[key] = (
+            comm.Split(leader, 0 if rank == leader else rank + 1),
+            comm.Split(0 if rank == leader else MPI.UNDEFINED, rank),
+        )
+    reduce_comm, gather_comm = _GATHER_COMM[key]
+
+    # Combine the partial results along the reduced grid directions onto the rank aligned with the root.
+    sendbuf = numpy.ascontiguousarray(data).reshape(-1)
+    if reduce_comm.Get_size() > 1:
+        recvbuf = numpy.empty_like(sendbuf) if rank == leader else None
+        reduce_comm.Reduce(sendbuf, recvbuf, MPI.SUM, 0)
+        sendbuf = recvbuf
+
+    if gather_comm == MPI.COMM_NULL:
+        return None, None, None, None, None, None, ()
+    gather_root = MPI.Group.Translate_ranks(comm.Get_group(), [root], gather_comm.Get_group())[0]
+    global_shape = [prefix_size, Gt * Lt, Gz * Lz, Gy * Ly, Gx * Lx, suffix_size]
+    local_shape = [prefix_size, Lt, Lz, Ly, Lx, suffix_size]
+    etype, btype = _getLatticeBlockType(sendbuf.dtype, global_shape, local_shape)
+    if rank == root:
+        # Every block lands directly at its place in the global array through the subarray datatype.
+        gather_size = gather_comm.Get_size()
+        gather_ranks = MPI.Group.Translate_ranks(gather_comm.Get_group(), list(range(gather_size)), comm.Get_group())
+        displs = []
+        for world_rank in gather_ranks:
+            gt, gz, gy, gx = [
+                g if axis >= 0 else 0 for g, axis in zip(getCoordFromRank(world_rank, grid_size)[::-1], axes)
+            ]
+            displs.append(int(numpy.ravel_multi_index((0, gt * Lt, gz * Lz, gy * Ly, gx * Lx, 0), global_shape)))
+        global_size = [G * L for G, L, axis in zip([Gt, Gz, Gy, Gx], [Lt, Lz, Ly, Lx], axes) if axis >= 0]
+        data = numpy.empty((*prefix, *global_size, *suffix), sendbuf.dtype)
+        recvbuf = [data, ([1] * gather_size, displs), btype]
     else:
-        sendbuf = data.reshape(-1)
+        data = None
         recvbuf = None
-        getMPIComm().Gatherv(sendbuf, recvbuf, root)
+    sendbuf = [sendbuf, sendbuf.size, etype]
+
+    return gather_comm, gather_root, sendbuf, recvbuf, data, grid_size, (etype, btype)
+
+
+def gatherLattice(data: numpy.ndarray, axes: List[int], reduce_op: Literal["sum", "mean"] = "sum", root: int = 0):
+    """
+    Gather the lattice data distributed on all ranks onto the root rank.
+
+    `axes` gives the t, z, y, x axes of `data`. A direction marked by -1 is already reduced on each rank,
+    and the partial results are combined over the grid along that direction before gathering, so only the
+    surviving axes are sent to the root.
+    """
+    if reduce_op.lower() not in ("sum", "mean"):
+        raise NotImplementedError(f"core.gather doesn't support reduce operator reduce_op={reduce_op}")
+
+    gather_comm, gather_root, sendbuf, recvbuf, data, grid_size, datatypes = _gatherLatticeSetup(data, axes, root)
+    if gather_comm is None:
         return None
+    gather_comm.Gatherv(sendbuf, recvbuf, gather_root)
+    for datatype in datatypes:
+        datatype.Free()
+
+    if data is not None and reduce_op.lower() == "mean":
+        data = data / int(numpy.prod([G for G, axis in zip(grid_size[::-1], axes) if axis < 0]))
+    return data
+
+
+def igatherLattice(data: numpy.ndarray, axes: List[int], root: int = 0):
+    """
+    Nonblocking version of `gatherLattice` with the sum reduction.
+
+    Returns the request and the global array, which is only valid on the root after the request is completed.
+    """
+    gather_comm, gather_root, sendbuf, recvbuf, data, grid_size, datatypes = _gatherLatticeSetup(data, axes, root)
+    if gather_comm is None:
+        return MPI.REQUEST_NULL, None
+    request = gather_comm.Igatherv(sendbuf, recvbuf, gather_root)
+    for datatype in datatypes:
+        datatype.Free()
+
+    return request, data
+
+
+def scatterLattice(data: numpy.ndarray, axes: List[int], root: int = 0, pipeline: bool = False):
+    """
+    Scatter the global lattice data on the root rank to all ranks, the inverse of `gatherLattice`.
+
+    `axes` gives the t, z, y, x axes of `data` and `data` is only referenced on the root, so a file-backed
+    `numpy.memmap` works there. With `pipeline=True` the data is sent one global timeslice at a time and
+    the root only holds a single timeslice in memory besides `data` itself.
+    """
+    comm = getMPIComm()
+    rank = getMPIRank()
+    size = comm.Get_size()
+    grid_size = getGridSize()
+    shape, dtype = comm.bcast((data.shape, data.dtype.str) if rank == root else None, root)
+    dtype = numpy.dtype(dtype)
+    keep = tuple([axis for axis in axes if axis >= 0])
+    if len(keep) != 4 or keep != tuple(range(keep[0], keep[0] + 4)):
+        raise ValueError(f"core.scatter requires contiguous t, z, y, x axes, but axes={axes}")
+    prefix = shape[: keep[0]]
+    suffix = shape[keep[-1] + 1 :]
+    prefix_size = int(numpy.prod(prefix))
+    suffix_size = int(numpy.prod(suffix))
+    Gt, Gz, Gy, Gx = grid_size[::-1]
+    GLt, GLz, GLy, GLx = shape[keep[0] : keep[-1] + 1]
+    Lt, Lz, Ly, Lx = GLt // Gt, GLz // Gz, GLy // Gy, GLx // Gx
+    coords = [getCoordFromRank(i, grid_size)[::-1] for i in range(size)]
+    gt = coords[rank][0]
+
+    local = numpy.empty((*prefix, Lt, Lz, Ly, Lx, *suffix), dtype)
+    if not pipeline:
+        global_shape = [prefix_size, GLt, GLz, GLy, GLx, suffix_size]
+        local_shape = [prefix_size, Lt, Lz, Ly, Lx, suffix_size]
+        etype, btype = _getLatticeBlockType(dtype, global_shape, local_shape)
+        if rank == root:
+            displs = [
+                int(numpy.ravel_multi_index((0, t * Lt, z * Lz, y * Ly, x * Lx, 0), global_shape))
+                for t, z, y, x in coords
+            ]
+            sendbuf = [numpy.ascontiguousarray(data), ([1] * size, displs), btype]
+        else:
+            sendbuf = None
+        comm.Scatterv(sendbuf, [local, local.size, etype], root)
+        etype.Free()
+        btype.Free()
+        return local
+
+    # Every rank takes part in each timeslice, and only the ranks holding it receive a block.
+    slice_shape = [prefix_size, 1, GLz, GLy, GLx, suffix_size]
+    block_shape = [prefix_size, 1, Lz, Ly, Lx, suffix_size]
+    local_shape = [prefix_size, Lt, Lz, Ly, Lx, suffix_size]
+    etype, btype = _getLatticeBlockType(dtype, slice_shape, block_shape)
+    recvtypes = [etype.Create_subarray(local_shape, block_shape, [0, t, 0, 0, 0, 0]).Commit() for t in range(Lt)]
+    displs = [int(numpy.ravel_multi_index((0, 0, z * Lz, y * Ly, x * Lx, 0), slice_shape)) for t, z, y, x in coords]
+    for t in range(GLt):
+        if rank == root:
+            data_t = numpy.ascontiguousarray(data[(slice(None),) * keep[0] + (slice(t, t + 1),)].reshape(slice_shape))
+            counts = [1 if coord[0] == t // Lt else 0 for coord in coords]
+            sendbuf = [data_t, (counts, displs), btype]
+        else:
+            sendbuf = None
+        recvbuf = [local, 1 if gt == t // Lt else 0, recvtypes[t % Lt]]
+        comm.Scatterv(sendbuf, recvbuf, root)
+    for recvtype in recvtypes:
+        recvtype.Free()
+    etype.Free()
+    btype.Free()
+    return local
+
+
+def _getGeoBlockSize(multigrid: List[List[int]]):
+    if not multigrid:
+        return None
+    elif not isinstance(multigrid, list):
+        return [[2, 2, 2, 2], [4, 4, 4, 4]]
+    else:
+        return multigrid
 
 
 def getDslash(
@@ -205,6 +384,7 @@ def getDslash(
     clover_coeff_r: float = 1.0,
     anti_periodic_t: bool = True,
     multigrid: List[List[int]] = None,
+    precision: Union[str, PrecisionProfile] = None,
 ):
     Gx, Gy, Gz, Gt = getGridSize()
     Lx, Ly, Lz, Lt = latt_size
@@ -222,23 +402,17 @@ def getDslash(
         t_boundary = -1
     else:
         t_boundary = 1
-    if not multigrid:
-        geo_block_size = None
-    else:
-        if not isinstance(multigrid, list):
-            geo_block_size = [[2, 2, 2, 2], [4, 4, 4, 4]]
-        else:
-            geo_block_size = multigrid
+    geo_block_size = _getGeoBlockSize(multigrid)
     latt_info = LatticeInfo([Lx, Ly, Lz, Lt], t_boundary, xi)
 
     if clover_coeff != 0.0:
         from .dirac.clover_wilson import CloverWilson
 
-        return CloverWilson(latt_info, mass, kappa, tol, maxiter, clover_coeff, clover_xi, geo_block_size)
+        return CloverWilson(latt_info, mass, kappa, tol, maxiter, clover_coeff, clover_xi, geo_block_size, precision)
     else:
         from .dirac.wilson import Wilson
 
-        return Wilson(latt_info, mass, kappa, tol, maxiter, geo_block_size)
+        return Wilson(latt_info, mass, kappa, tol, maxiter, geo_block_size, precision)
 
 
 def getStaggeredDslash(
@@ -249,7 +423,14 @@ def getStaggeredDslash(
     tadpole_coeff: float = 1.0,
     naik_epsilon: float = 0.0,
     anti_periodic_t: bool = True,
+    multigrid: List[List[int]] = None,
+    precision: Union[str, PrecisionProfile] = None,
 ):
+    """
+    With `multigrid`, the HISQ operator prepends the optimized Kahler-Dirac level (block size 1, 3 vectors) to the
+    aggregation blocks in `multigrid`, so the hierarchy has one more level than requested. Every aggregation level
+    uses 64 null vectors, see `HISQ.newQudaMultigridParam`.
+    """
     Gx, Gy, Gz, Gt = getGridSize()
     Lx, Ly, Lz, Lt = latt_size
     Lx, Ly, Lz, Lt = Lx * Gx, Ly * Gy, Lz * Gz, Lt * Gt
@@ -261,9 +442,11 @@ def getStaggeredDslash(
         t_boundary = 1
     latt_info = LatticeInfo([Lx, Ly, Lz, Lt], t_boundary, 1.0)
 
+    geo_block_size = _getGeoBlockSize(multigrid)
+
     from .dirac.hisq import HISQ
 
-    return HISQ(latt_info, mass, kappa, tol, maxiter, tadpole_coeff, naik_epsilon, None)
+    return HISQ(latt_info, mass, kappa, tol, maxiter, tadpole_coeff, naik_epsilon, geo_block_size, precision)
 
 
 def getDirac(
@@ -275,6 +458,7 @@ def getDirac(
     clover_coeff_t: float = 0.0,
     clover_coeff_r: float = 1.0,
     multigrid: List[List[int]] = None,
+    precision: Union[str, PrecisionProfile] = None,
 ):
     xi = latt_info.anisotropy
     kappa = 1 / (2 * (mass + 1 + (Nd - 1) / xi))
@@ -284,22 +468,16 @@ def getDirac(
     else:
         clover_coeff = clover_coeff_t
         clover_xi = 1.0
-    if not multigrid:
-        geo_block_size = None
-    else:
-        if not isinstance(multigrid, list):
-            geo_block_size = [[2, 2, 2, 2], [4, 4, 4, 4]]
-        else:
-            geo_block_size = multigrid
+    geo_block_size = _getGeoBlockSize(multigrid)
 
     if clover_coeff != 0.0:
         from .dirac.clover_wilson import CloverWilson
 
-        return CloverWilson(latt_info, mass, kappa, tol, maxiter, clover_coeff, clover_xi, geo_block_size)
+        return CloverWilson(latt_info, mass, kappa, tol, maxiter, clover_coeff, clover_xi, geo_block_size, precision)
     else:
         from .dirac.wilson import Wilson
 
-        return Wilson(latt_info, mass, kappa, tol, maxiter, geo_block_size)
+        return Wilson(latt_info, mass, kappa, tol, maxiter, geo_block_size, precision)
 
 
 def getStaggeredDirac(
@@ -309,10 +487,19 @@ def getStaggeredDirac(
     maxiter: int,
     tadpole_coeff: float = 1.0,
     naik_epsilon: float = 0.0,
+    multigrid: List[List[int]] = None,
+    precision: Union[str, PrecisionProfile] = None,
 ):
+    """
+    With `multigrid`, the HISQ operator prepends the optimized Kahler-Dirac level (block size 1, 3 vectors) to the
+    aggregation blocks in `multigrid`, so the hierarchy has one more level than requested. Every aggregation level
+    uses 64 null vectors, see `HISQ.newQudaMultigridParam`.
+    """
     assert latt_info.anisotropy == 1.0
     kappa = 1 / (2 * (mass + Nd))
 
+    geo_block_size = _getGeoBlockSize(multigrid)
+
     from .dirac.hisq import HISQ
 
-    return HISQ(latt_info, mass, kappa, tol, maxiter, tadpole_coeff, naik_epsilon, None)
+    return HISQ(latt_info, mass, kappa, tol, maxiter, tadpole_coeff, naik_epsilon, geo_block_size, precision)
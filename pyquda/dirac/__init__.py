@@ -1,8 +1,20 @@
 from abc import ABC, abstractmethod
 
 from ..pointer import Pointer
-from ..pyquda import QudaGaugeParam, QudaInvertParam, QudaMultigridParam
+from ..pyquda import (
+    QudaGaugeParam,
+    QudaInvertParam,
+    QudaMultigridParam,
+    newMultigridQuda,
+    updateMultigridQuda,
+    MatQuda,
+    MatDagMatQuda,
+)
 from ..field import LatticeInfo, LatticeGauge, LatticeFermion
+from ..enum_quda import QudaBoolean, QudaDagType, QUDA_MAX_MG_LEVEL
+
+from . import general
+from .cache import MultigridCache
 
 
 class Dirac(ABC):
@@ -12,9 +24,15 @@ class Dirac(ABC):
     mg_param: QudaMultigridParam
     mg_inv_param: QudaInvertParam
     mg_instance: Pointer
+    mg_cache: MultigridCache
 
     def __init__(self, latt_info: LatticeInfo) -> None:
         self.latt_info = latt_info
+        self.mg_cache = None
+        self.mg_rebuild_interval = 1
+        self.mg_iter_threshold = 0.0
+        self.mg_refresh_count = 0
+        self.mg_iter_baseline = 0
 
     @abstractmethod
     def loadGauge(self, gauge: LatticeGauge):
@@ -25,5 +43,93 @@ class Dirac(ABC):
         pass
 
     @abstractmethod
-    def invert(self, b: LatticeFermion):
+    def invert(self, b: LatticeFermion, x0: LatticeFermion = None):
         pass
+
+    def apply(self, x: LatticeFermion, dagger: bool = False, normal: bool = False):
+        """
+        Apply M, M^dagger or, with `normal`, M^dagger M to `x` on the resident gauge field. M uses the same
+        normalization as `invert`, so `apply(invert(b))` gives back `b`.
+        """
+        y = type(x)(x.latt_info)
+        if normal:
+            MatDagMatQuda(y.data_ptr, x.data_ptr, self.invert_param)
+        else:
+            self.invert_param.dagger = QudaDagType.QUDA_DAG_YES if dagger else QudaDagType.QUDA_DAG_NO
+            MatQuda(y.data_ptr, x.data_ptr, self.invert_param)
+            self.invert_param.dagger = QudaDagType.QUDA_DAG_NO
+        return y
+
+    def setMultigridCache(self, path: str, budget: int = 16 * 1024**3):
+        """
+        Reuse the multigrid null vectors stored under `path` for a gauge field and Dirac parameters seen before,
+        keeping at most `budget` bytes on disk.
+        """
+        self.mg_cache = MultigridCache(path, budget)
+
+    def setMultigridRefresh(self, rebuild_interval: int, iter_threshold: float = 1.5):
+        """
+        Refresh the null vectors of the existing multigrid instance with `setup_maxiter_refresh` iterations when
+        a new gauge field is loaded instead of doing the full setup. The full setup is still done every
+        `rebuild_interval` gauge fields, or when the iteration count of the last solve exceeds `iter_threshold`
+        times the one measured on the gauge field of the last full setup. `rebuild_interval=1` always rebuilds.
+        """
+        self.mg_rebuild_interval = rebuild_interval
+        self.mg_iter_threshold = iter_threshold
+
+    def setupMultigrid(self, gauge: LatticeGauge):
+        if self.mg_param is not None:
+            if self.mg_instance is not None and self.mg_refresh_count + 1 < self.mg_rebuild_interval:
+                last_iter = self.invert_param.iter
+                if self.mg_refresh_count == 0 or self.mg_iter_baseline == 0:
+                    self.mg_iter_baseline = last_iter
+                if last_iter <= self.mg_iter_threshold * self.mg_iter_baseline:
+                    self.mg_refresh_count += 1
+                    self.mg_param.thin_update_only = QudaBoolean.QUDA_BOOLEAN_FALSE
+                    updateMultigridQuda(self.mg_instance, self.mg_param)
+                    return
+            self.destroy()
+            if self.mg_cache is not None:
+                self.mg_instance = self.mg_cache.newMultigrid(gauge, self.mg_param, self.mg_inv_param)
+            else:
+                self.mg_instance = newMultigridQuda(self.mg_param)
+            self.mg_refresh_count = 0
+            self.invert_param.preconditioner = self.mg_instance
+
+    def updateMass(self, mass: float, kappa: float):
+        self.flushChrono()
+        self.invert_param.mass = mass
+        self.invert_param.kappa = kappa
+        if self.mg_param is not None:
+            self.mg_inv_param.mass = mass
+            self.mg_inv_param.kappa = kappa
+            if self.mg_instance is not None:
+                # A full update rebuilds the fine and coarse operators from mg_inv_param, and with no refresh
+                # iterations it keeps the null vectors as they are.
+                setup_maxiter_refresh = self.mg_param.setup_maxiter_refresh
+                self.mg_param.setup_maxiter_refresh = [0] * QUDA_MAX_MG_LEVEL
+                self.mg_param.thin_update_only = QudaBoolean.QUDA_BOOLEAN_FALSE
+                updateMultigridQuda(self.mg_instance, self.mg_param)
+                self.mg_param.setup_maxiter_refresh = setup_maxiter_refresh
+
+    def autotune(self, b: LatticeFermion, gauge: LatticeGauge = None, path: str = None, retune: bool = False):
+        """
+        Pick the fastest converging solver settings with trial solves of `b`, or load them from `path` if this
+        action, lattice, mass and GPU count have been tuned before. See `autotune.autotune` for details.
+        """
+        from .autotune import autotune
+
+        return autotune(self, b, gauge, None, path, retune)
+
+    def setChrono(self, max_dim: int, index: int = 0):
+        """
+        Use the last `max_dim` solutions to forecast the initial guess of the next solve.
+
+        The history is kept by QUDA under `index`, and is flushed whenever a new gauge is loaded.
+        Use `max_dim=0` to disable the chronological forecasting.
+        """
+        self.flushChrono()
+        general.setChrono(self.invert_param, max_dim, index)
+
+    def flushChrono(self):
+        general.flushChrono(self.invert_param)
@@ -0,0 +1,226 @@
+import json
+import os
+from itertools import product
+from typing import List
+
+from .. import getMPIComm, getMPIRank, getMPISize
+from ..pyquda import updateMultigridQuda
+from ..field import LatticeGauge, LatticeFermion
+from ..enum_quda import (
+    QUDA_MAX_MG_LEVEL,
+    QudaBoolean,
+    QudaDslashType,
+    QudaInverterType,
+    QudaPrecision,
+    QudaSolveType,
+    QudaVerbosity,
+)
+
+from . import Dirac, general
+
+_INVERT_KEYS = ("inv_type", "solve_type", "gcrNkrylov", "reliable_delta")
+_MULTIGRID_KEYS = ("coarse_solver_tol", "coarse_solver_maxiter", "nu_post")
+
+
+def candidates(dirac: Dirac, tune_sloppy: bool = False) -> List[dict]:
+    """
+    The default candidate grid. Staggered actions only use CG on the even-odd preconditioned system, and the
+    sloppy precision is only scanned without multigrid, which needs at least single precision.
+    """
+    cg = QudaInverterType.QUDA_CG_INVERTER
+    bicgstab = QudaInverterType.QUDA_BICGSTAB_INVERTER
+    gcr = QudaInverterType.QUDA_GCR_INVERTER
+    normop_pc = QudaSolveType.QUDA_NORMOP_PC_SOLVE
+    direct_pc = QudaSolveType.QUDA_DIRECT_PC_SOLVE
+    if tune_sloppy and dirac.mg_param is None:
+        sloppy_precs = [QudaPrecision.QUDA_SINGLE_PRECISION, QudaPrecision.QUDA_HALF_PRECISION]
+    else:
+        sloppy_precs = [dirac.invert_param.cuda_prec_sloppy]
+
+    ret = []
+    if dirac.mg_param is not None:
+        for gcrNkrylov, coarse_tol, coarse_maxiter, nu_post in product([8, 12, 16], [0.1, 0.25], [8, 12], [4, 8]):
+            ret.append(
+                {
+                    "inv_type": gcr,
+                    "solve_type": direct_pc,
+                    "gcrNkrylov": gcrNkrylov,
+                    "reliable_delta": dirac.invert_param.reliable_delta,
+                    "coarse_solver_tol": coarse_tol,
+                    "coarse_solver_maxiter": coarse_maxiter,
+                    "nu_post": nu_post,
+                }
+            )
+    elif dirac.invert_param.dslash_type in (QudaDslashType.QUDA_STAGGERED_DSLASH, QudaDslashType.QUDA_ASQTAD_DSLASH):
+        for sloppy_prec, reliable_delta in product(sloppy_precs, [0.1, 0.01, 0.001]):
+            ret.append(
+                {
+                    "inv_type": cg,
+                    "solve_type": direct_pc,
+                    "gcrNkrylov": dirac.invert_param.gcrNkrylov,
+                    "reliable_delta": reliable_delta,
+                    "sloppy": sloppy_prec,
+                }
+            )
+    else:
+        for sloppy_prec, reliable_delta in product(sloppy_precs, [0.1, 0.01]):
+            for inv_type, solve_type in ((cg, normop_pc), (bicgstab, direct_pc)):
+                ret.append(
+                    {
+                        "inv_type": inv_type,
+                        "solve_type": solve_type,
+                        "gcrNkrylov": dirac.invert_param.gcrNkrylov,
+                        "reliable_delta": reliable_delta,
+                        "sloppy": sloppy_prec,
+                    }
+                )
+            for gcrNkrylov in [10, 20, 30]:
+                ret.append(
+                    {
+                        "inv_type": gcr,
+                        "solve_type": direct_pc,
+                        "gcrNkrylov": gcrNkrylov,
+                        "reliable_delta": reliable_delta,
+                        "sloppy": sloppy_prec,
+                    }
+                )
+    return ret
+
+
+def current(dirac: Dirac) -> dict:
+    ret = {key: getattr(dirac.invert_param, key) for key in _INVERT_KEYS}
+    if dirac.mg_param is not None:
+        ret.update({key: getattr(dirac.mg_param, key)[0] for key in _MULTIGRID_KEYS})
+    else:
+        ret["sloppy"] = dirac.invert_param.cuda_prec_sloppy
+    return ret
+
+
+def setSloppyPrecision(dirac: Dirac, gauge: LatticeGauge, sloppy_prec: QudaPrecision):
+    """
+    QUDA checks the sloppy precision of the solver against the resident gauge and clover fields, so they are
+    loaded again with the new precision.
+    """
+    if sloppy_prec == dirac.invert_param.cuda_prec_sloppy:
+        return
+    dirac.precision = dirac.precision._replace(sloppy=sloppy_prec)
+    dirac.gauge_param.cuda_prec_sloppy = sloppy_prec
+    dirac.gauge_param.cuda_prec_refinement_sloppy = sloppy_prec
+    dirac.invert_param.cuda_prec_sloppy = sloppy_prec
+    dirac.invert_param.cuda_prec_refinement_sloppy = sloppy_prec
+    dirac.invert_param.chrono_precision = sloppy_prec
+    if dirac.invert_param.clover_coeff != 0.0:
+        dirac.invert_param.clover_cuda_prec_sloppy = sloppy_prec
+        dirac.invert_param.clover_cuda_prec_refinement_sloppy = sloppy_prec
+    dirac.loadGauge(gauge)
+
+
+def apply(dirac: Dirac, choice: dict, gauge: LatticeGauge = None):
+    for key in _INVERT_KEYS:
+        setattr(dirac.invert_param, key, choice[key])
+    if dirac.mg_param is not None:
+        for key in _MULTIGRID_KEYS:
+            setattr(dirac.mg_param, key, [choice[key]] * QUDA_MAX_MG_LEVEL)
+        dirac.invert_param.tol_precondition = choice["coarse_solver_tol"]
+        dirac.invert_param.maxiter_precondition = choice["coarse_solver_maxiter"]
+        if dirac.mg_instance is not None:
+            dirac.mg_param.thin_update_only = QudaBoolean.QUDA_BOOLEAN_TRUE
+            updateMultigridQuda(dirac.mg_instance, dirac.mg_param)
+    elif "sloppy" in choice and choice["sloppy"] != dirac.invert_param.cuda_prec_sloppy:
+        if gauge is None:
+            raise ValueError("Changing the sloppy precision reloads the gauge field, pass the resident gauge")
+        setSloppyPrecision(dirac, gauge, QudaPrecision(choice["sloppy"]))
+
+
+def tuneKey(dirac: Dirac) -> str:
+    Lx, Ly, Lz, Lt = dirac.latt_info.global_size
+    action = f"{type(dirac).__name__}_{int(dirac.invert_param.dslash_type)}"
+    if dirac.invert_param.clover_coeff != 0.0:
+        action += f"_csw{dirac.invert_param.clover_coeff / dirac.invert_param.kappa:.6g}"
+    return f"{action}:{Lx}x{Ly}x{Lz}x{Lt}:mass{dirac.invert_param.mass:.6g}:gpus{getMPISize()}"
+
+
+def tunePath(path: str = None) -> str:
+    if path is None:
+        path = os.path.join(os.environ.get("QUDA_RESOURCE_PATH", "."), "pyquda_autotune.json")
+    return path
+
+
+def loadTune(key: str, path: str = None) -> dict:
+    choice = None
+    if getMPIRank() == 0:
+        path = tunePath(path)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                choice = json.load(f).get(key)
+    return getMPIComm().bcast(choice, 0)
+
+
+def saveTune(key: str, choice: dict, path: str = None):
+    if getMPIRank() == 0:
+        path = tunePath(path)
+        cache = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                cache = json.load(f)
+        cache[key] = choice
+        with open(path + ".tmp", "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+    getMPIComm().Barrier()
+
+
+def autotune(
+    dirac: Dirac,
+    b: LatticeFermion,
+    gauge: LatticeGauge = None,
+    candidate_list: List[dict] = None,
+    path: str = None,
+    retune: bool = False,
+) -> dict:
+    """
+    Run a trial solve of `b` for every candidate and keep the fastest one whose true residual is within ten times
+    the requested tolerance before `maxiter`. The choice is stored in `path`, by default
+    `$QUDA_RESOURCE_PATH/pyquda_autotune.json`, keyed by the action, the lattice size, the mass and the number of
+    GPUs, and is applied without any trial solve when the key is found again.
+
+    Pass the resident `gauge` to also scan the sloppy precision, which reloads the gauge field.
+    """
+    key = tuneKey(dirac)
+    choice = loadTune(key, path) if not retune else None
+    if choice is not None:
+        apply(dirac, choice, gauge)
+        return choice
+
+    invert_param = dirac.invert_param
+    default = current(dirac)
+    if candidate_list is None:
+        candidate_list = candidates(dirac, gauge is not None)
+    verbosity = invert_param.verbosity
+    invert_param.verbosity = QudaVerbosity.QUDA_SILENT
+    chrono_max_dim, chrono_index = invert_param.chrono_max_dim, invert_param.chrono_index
+    dirac.setChrono(0, chrono_index)
+    timing = []
+    for candidate in candidate_list:
+        apply(dirac, candidate, gauge)
+        dirac.invert(b)
+        converged = invert_param.true_res <= 10 * invert_param.tol and invert_param.iter < invert_param.maxiter
+        timing.append(invert_param.secs if converged else float("inf"))
+    invert_param.verbosity = verbosity
+    general.setChrono(invert_param, chrono_max_dim, chrono_index)
+
+    best = None
+    if getMPIRank() == 0:
+        best = min(range(len(timing)), key=timing.__getitem__)
+        if timing[best] == float("inf"):
+            best = None
+    best = getMPIComm().bcast(best, 0)
+    if best is None:
+        apply(dirac, default, gauge)
+        return default
+    choice = {
+        name: float(value) if isinstance(value, float) else int(value) for name, value in candidate_list[best].items()
+    }
+    apply(dirac, choice, gauge)
+    saveTune(key, choice, path)
+    return choice
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import weakref
+from time import time
+
+import numpy
+
+from .. import getMPIComm, getMPIRank, getGridSize
+from ..pointer import Pointer
+from ..pyquda import QudaGaugeParam, QudaInvertParam, QudaMultigridParam, newMultigridQuda, dumpMultigridQuda
+from ..field import LatticeInfo, LatticeGauge
+from ..enum_quda import QudaBoolean, QUDA_MAX_MG_LEVEL
+
+
+def gaugeFingerprint(gauge: LatticeGauge) -> str:
+    """SHA-1 of the gauge field over all ranks, identical on every rank."""
+    local = hashlib.sha1(gauge.getHost().tobytes()).hexdigest()
+    return hashlib.sha1("".join(getMPIComm().allgather(local)).encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Entries are directories under `path`, which must be visible to all ranks. The total size is kept under
+    `budget` bytes by removing the least recently used entries, and only the root rank touches the directory.
+    """
+
+    def __init__(self, path: str, budget: int) -> None:
+        self.path = os.path.realpath(path)
+        self.budget = budget
+        if getMPIRank() == 0:
+            os.makedirs(self.path, exist_ok=True)
+
+    def entry(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def hit(self, key: str) -> bool:
+        hit = None
+        if getMPIRank() == 0:
+            hit = os.path.exists(os.path.join(self.entry(key), ".complete"))
+            if hit:
+                os.utime(self.entry(key))
+        return getMPIComm().bcast(hit, 0)
+
+    def reserve(self, key: str):
+        if getMPIRank() == 0:
+            shutil.rmtree(self.entry(key), ignore_errors=True)
+            os.makedirs(self.entry(key))
+        getMPIComm().Barrier()
+
+    def commit(self, key: str, meta: dict = None):
+        getMPIComm().Barrier()
+        if getMPIRank() == 0:
+            with open(os.path.join(self.entry(key), ".complete"), "w") as f:
+                json.dump({"time": time(), **(meta if meta is not None else {})}, f)
+            self.evict(key)
+        getMPIComm().Barrier()
+
+    def evict(self, keep: str = None):
+        entries = []
+        total = 0
+        for key in os.listdir(self.path):
+            entry = self.entry(key)
+            if not os.path.isdir(entry):
+                continue
+            size = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(entry) for file in files)
+            entries.append((os.path.getmtime(entry), size, key))
+            total += size
+        for _, size, key in sorted(entries):
+            if total <= self.budget:
+                break
+            if key != keep:
+                shutil.rmtree(self.entry(key), ignore_errors=True)
+                total -= size
+
+
+class MultigridCache:
+    """
+    Store the null vectors of a multigrid setup with `dumpMultigridQuda` and load them with `vec_load`
+    when the same gauge field and Dirac parameters are seen again. QUDA needs to be built with QIO.
+    """
+
+    def __init__(self, path: str, budget: int = 16 * 1024**3) -> None:
+        self.disk = DiskCache(path, budget)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, gauge: LatticeGauge, mg_param: QudaMultigridParam, mg_inv_param: QudaInvertParam):
+        n_level = mg_param.n_level
+        meta = {
+            "gauge": gaugeFingerprint(gauge),
+            "latt_size": gauge.latt_info.global_size,
+            "dslash_type": int(mg_inv_param.dslash_type),
+            "mass": mg_inv_param.mass,
+            "kappa": mg_inv_param.kappa,
+            "clover_coeff": mg_inv_param.clover_coeff,
+            "n_level": n_level,
+            "geo_block_size": [list(block) for block in mg_param.geo_block_size[:n_level]],
+            "spin_block_size": list(mg_param.spin_block_size[:n_level]),
+            "n_vec": list(mg_param.n_vec[:n_level]),
+            "precision_null": [int(prec) for prec in mg_param.precision_null[:n_level]],
+            "setup_tol": list(mg_param.setup_tol[:n_level]),
+            "setup_maxiter": list(mg_param.setup_maxiter[:n_level]),
+        }
+        return hashlib.sha1(json.dumps(meta, sort_keys=True).encode()).hexdigest(), meta
+
+    def newMultigrid(self, gauge: LatticeGauge, mg_param: QudaMultigridParam, mg_inv_param: QudaInvertParam) -> Pointer:
+        key, meta = self.key(gauge, mg_param, mg_inv_param)
+        n_level = mg_param.n_level
+        vec_file = [
+            os.path.join(self.disk.entry(key), f"level{i}").encode().ljust(256, b"\0") for i in range(QUDA_MAX_MG_LEVEL)
+        ]
+        vec_enable = [QudaBoolean.QUDA_BOOLEAN_TRUE] * (n_level - 1) + [QudaBoolean.QUDA_BOOLEAN_FALSE] * (
+            QUDA_MAX_MG_LEVEL - n_level + 1
+        )
+        vec_disable = [QudaBoolean.QUDA_BOOLEAN_FALSE] * QUDA_MAX_MG_LEVEL
+        if self.disk.hit(key):
+            self.hits += 1
+            mg_param.vec_load = vec_enable
+            mg_param.vec_infile = vec_file
+            mg_instance = newMultigridQuda(mg_param)
+            mg_param.vec_load = vec_disable
+        else:
+            self.misses += 1
+            self.disk.reserve(key)
+            mg_instance = newMultigridQuda(mg_param)
+            mg_param.vec_store = vec_enable
+            mg_param.vec_outfile = vec_file
+            dumpMultigridQuda(mg_instance, mg_param)
+            mg_param.vec_store = vec_disable
+            self.disk.commit(key, meta)
+        return mg_instance
+
+
+class LinkCache:
+    """
+    Store the HISQ fat and long links, one file per rank, and load them instead of computing them again when the
+    same gauge field, path coefficients and process grid are seen again.
+    """
+
+    def __init__(self, path: str, budget: int = 16 * 1024**3) -> None:
+        self.disk = DiskCache(path, budget)
+        self.hits = 0
+        self.misses = 0
+        self.fingerprints = weakref.WeakKeyDictionary()
+
+    def fingerprint(self, gauge: LatticeGauge) -> str:
+        # Hashing copies the field to the host, so it is done once per version of the gauge field.
+        version, fingerprint = self.fingerprints.get(gauge, (None, None))
+        if version != gauge.version:
+            version, fingerprint = gauge.version, gaugeFingerprint(gauge)
+            self.fingerprints[gauge] = (version, fingerprint)
+        return fingerprint
+
+    def key(self, gauge: LatticeGauge, gauge_param: QudaGaugeParam, path_coeff: numpy.ndarray):
+        meta = {
+            "gauge": self.fingerprint(gauge),
+            "latt_size": gauge.latt_info.global_size,
+            "grid_size": getGridSize(),
+            "t_boundary": int(gauge_param.t_boundary),
+            "tadpole_coeff": gauge_param.tadpole_coeff,
+            "path_coeff": path_coeff.tolist(),
+            "staggered_phase_type": int(gauge_param.staggered_phase_type),
+        }
+        return hashlib.sha1(json.dumps(meta, sort_keys=True).encode()).hexdigest(), meta
+
+    def hit(self, key: str) -> bool:
+        if self.disk.hit(key):
+            self.hits += 1
+            return True
+        else:
+            self.misses += 1
+            return False
+
+    def reserve(self, key: str):
+        self.disk.reserve(key)
+
+    def commit(self, key: str, meta: dict):
+        self.disk.commit(key, meta)
+
+    def save(self, key: str, name: str, link: LatticeGauge):
+        numpy.save(os.path.join(self.disk.entry(key), f"{name}.{getMPIRank()}.npy"), link.getHost())
+
+    def load(self, key: str, name: str, latt_info: LatticeInfo) -> LatticeGauge:
+        link = LatticeGauge(latt_info, numpy.load(os.path.join(self.disk.entry(key), f"{name}.{getMPIRank()}.npy")))
+        link.toDevice()
+        return link
@@ -1,10 +1,11 @@
-from typing import List
+from typing import List, Literal, Union
 
-from ..pyquda import newMultigridQuda, destroyMultigridQuda
-from ..field import LatticeInfo, LatticeGauge, LatticeFermion
+from ..pyquda import destroyMultigridQuda, freeCloverQuda, loadCloverQuda
+from ..field import Nd, LatticeInfo, LatticeGauge, LatticeFermion
 from ..enum_quda import QudaDslashType, QudaInverterType, QudaSolveType, QudaPrecision
 
 from . import Dirac, general
+from .resident import getResident, gaugeState, cloverState
 
 
 class CloverWilson(Dirac):
@@ -18,21 +19,25 @@ class CloverWilson(Dirac):
         clover_coeff: float = 0.0,
         clover_xi: float = 1.0,
         geo_block_size: List[List[int]] = None,
+        precision: Union[str, general.PrecisionProfile] = None,
+        solve_mode: Literal["direct", "schur", "schur_odd"] = "direct",
     ) -> None:
         super().__init__(latt_info)
-        cuda_prec_sloppy = general.cuda_prec_sloppy
+        precision = general.getPrecisionProfile(precision)
         single_prec = QudaPrecision.QUDA_SINGLE_PRECISION
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = single_prec  # Using half with multigrid doesn't work
+        if geo_block_size is not None and precision.sloppy < single_prec:
+            precision = precision._replace(sloppy=single_prec)  # Using half with multigrid doesn't work
+        self.precision = precision
+        self.solve_mode = solve_mode
         self.mg_instance = None
+        self.clover_coeff = clover_coeff
+        self.gauge = None
         self.newQudaGaugeParam()
         self.newQudaMultigridParam(geo_block_size, mass, kappa, 1e-1, 12, 5e-6, 1000, 0, 8)
         self.newQudaInvertParam(mass, kappa, tol, maxiter, clover_coeff, clover_xi)
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = cuda_prec_sloppy
 
     def newQudaGaugeParam(self):
-        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0)
+        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0, self.precision)
         self.gauge_param = gauge_param
 
     def newQudaMultigridParam(
@@ -49,7 +54,16 @@ class CloverWilson(Dirac):
     ):
         if geo_block_size is not None:
             mg_param, mg_inv_param = general.newQudaMultigridParam(
-                mass, kappa, geo_block_size, coarse_tol, coarse_maxiter, setup_tol, setup_maxiter, nu_pre, nu_post
+                mass,
+                kappa,
+                geo_block_size,
+                coarse_tol,
+                coarse_maxiter,
+                setup_tol,
+                setup_maxiter,
+                nu_pre,
+                nu_post,
+                self.precision,
             )
             mg_inv_param.dslash_type = QudaDslashType.QUDA_CLOVER_WILSON_DSLASH
         else:
@@ -61,7 +75,7 @@ class CloverWilson(Dirac):
         self, mass: float, kappa: float, tol: float, maxiter: int, clover_coeff: float, clover_xi: float
     ):
         invert_param = general.newQudaInvertParam(
-            mass, kappa, tol, maxiter, kappa * clover_coeff, clover_xi, self.mg_param
+            mass, kappa, tol, maxiter, kappa * clover_coeff, clover_xi, self.mg_param, self.precision
         )
         if self.mg_param is not None:
             invert_param.dslash_type = QudaDslashType.QUDA_CLOVER_WILSON_DSLASH
@@ -72,18 +86,55 @@ class CloverWilson(Dirac):
         self.invert_param = invert_param
 
     def loadGauge(self, gauge: LatticeGauge):
-        general.loadClover(gauge, self.gauge_param, self.invert_param)
-        general.loadGauge(gauge, self.gauge_param)
-        if self.mg_param is not None:
-            if self.mg_instance is not None:
-                self.destroy()
-            self.mg_instance = newMultigridQuda(self.mg_param)
-            self.invert_param.preconditioner = self.mg_instance
+        self.flushChrono()
+        general.loadCloverAndGauge(gauge, self.gauge_param, self.invert_param)
+        # Kept to rebuild the clover term on a mass change, see `updateClover`.
+        self.gauge = gauge
+        self.setupMultigrid(gauge)
+
+    def setMass(self, mass: float):
+        kappa = 1 / (2 * (mass + 1 + (Nd - 1) / self.latt_info.anisotropy))
+        self.updateClover(kappa)
+        self.updateMass(mass, kappa)
+
+    def setKappa(self, kappa: float):
+        mass = 1 / (2 * kappa) - 1 - (Nd - 1) / self.latt_info.anisotropy
+        self.updateClover(kappa)
+        self.updateMass(mass, kappa)
+
+    def updateClover(self, kappa: float):
+        # The clover term is computed with clover_coeff = kappa * csw, so it has to follow kappa.
+        self.invert_param.clover_coeff = kappa * self.clover_coeff
+        if self.gauge is None:
+            return
+        state = gaugeState(self.gauge_param)
+        resident = getResident()
+        if self.invert_param.clover_csw == self.gauge_param.anisotropy and resident.isResident(
+            "links", self.gauge, state
+        ):
+            # Rebuild the clover term and its inverse from the resident links without uploading them again.
+            freeCloverQuda()
+            loadCloverQuda(general.nullptr, general.nullptr, self.invert_param)
+            resident.record(self.gauge, {"clover": cloverState(state, self.invert_param)})
+        else:
+            # Another operator replaced the links since, or the clover term needs differently scaled links.
+            general.loadCloverAndGauge(self.gauge, self.gauge_param, self.invert_param)
 
     def destroy(self):
         if self.mg_instance is not None:
             destroyMultigridQuda(self.mg_instance)
             self.mg_instance = None
 
-    def invert(self, b: LatticeFermion):
-        return general.invert(b, self.invert_param)
+    def invert(self, b: LatticeFermion, x0: LatticeFermion = None):
+        """
+        With `solve_mode="schur"` the odd sites are solved with the Schur complement and the even sites are
+        reconstructed in PyQuda, and `solve_mode="schur_odd"` returns only the odd checkerboard of the solution.
+        """
+        if self.solve_mode == "direct":
+            return general.invert(b, self.invert_param, x0, self.mg_param)
+        elif self.solve_mode == "schur":
+            return general.invertPC(b, self.invert_param, x0, self.mg_param)
+        elif self.solve_mode == "schur_odd":
+            return general.invertPC(b, self.invert_param, x0, self.mg_param, True)
+        else:
+            raise ValueError(f"Unsupported solve mode {self.solve_mode}")
@@ -1,8 +1,7 @@
-from typing import List
+from typing import Dict, List, NamedTuple, Union
 
 import numpy as np
 
-from .. import getMPIRank
 from ..pointer import Pointer, Pointers, ndarrayDataPointer
 from ..pyquda import (
     QudaGaugeParam,
@@ -15,8 +14,9 @@ from ..pyquda import (
     dslashQuda,
     cloverQuda,
     staggeredPhaseQuda,
+    flushChronoQuda,
 )
-from ..field import LatticeInfo, LatticeGauge, LatticeFermion, LatticeStaggeredFermion
+from ..field import LatticeInfo, LatticeGauge, LatticeFermion, LatticeHalfFermion, LatticeStaggeredFermion
 from ..enum_quda import (  # noqa: F401
     QudaMemoryType,
     QudaLinkType,
@@ -81,6 +81,10 @@ from ..enum_quda import (  # noqa: F401
 )
 from ..enum_quda import QUDA_MAX_DIM, QUDA_MAX_MULTI_SHIFT, QUDA_MAX_MG_LEVEL
 
+from .cache import LinkCache
+from .telemetry import getTelemetry
+from .resident import getResident, gaugeState, cloverState
+
 nullptr = Pointer("void")
 nullptrs = Pointers("void", 0)
 
@@ -93,7 +97,83 @@ link_recon = QudaReconstructType.QUDA_RECONSTRUCT_12
 link_recon_sloppy = QudaReconstructType.QUDA_RECONSTRUCT_12
 
 
-def newQudaGaugeParam(lattice: LatticeInfo, tadpole_coeff: float, naik_epsilon: float):
+class PrecisionProfile(NamedTuple):
+    cpu: QudaPrecision
+    cuda: QudaPrecision
+    sloppy: QudaPrecision
+    precondition: QudaPrecision
+    eigensolver: QudaPrecision
+    reconstruct: QudaReconstructType
+    reconstruct_sloppy: QudaReconstructType
+
+
+PRECISION_PRESETS: Dict[str, PrecisionProfile] = {
+    "double": PrecisionProfile(
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaReconstructType.QUDA_RECONSTRUCT_NO,
+        QudaReconstructType.QUDA_RECONSTRUCT_NO,
+    ),
+    "double_single_12": PrecisionProfile(
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_SINGLE_PRECISION,
+        QudaPrecision.QUDA_SINGLE_PRECISION,
+        QudaPrecision.QUDA_SINGLE_PRECISION,
+        QudaReconstructType.QUDA_RECONSTRUCT_12,
+        QudaReconstructType.QUDA_RECONSTRUCT_12,
+    ),
+    "double_half_12": PrecisionProfile(
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_HALF_PRECISION,
+        QudaPrecision.QUDA_HALF_PRECISION,
+        QudaPrecision.QUDA_SINGLE_PRECISION,
+        QudaReconstructType.QUDA_RECONSTRUCT_12,
+        QudaReconstructType.QUDA_RECONSTRUCT_12,
+    ),
+    "double_half_8": PrecisionProfile(
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_DOUBLE_PRECISION,
+        QudaPrecision.QUDA_HALF_PRECISION,
+        QudaPrecision.QUDA_HALF_PRECISION,
+        QudaPrecision.QUDA_SINGLE_PRECISION,
+        QudaReconstructType.QUDA_RECONSTRUCT_12,
+        QudaReconstructType.QUDA_RECONSTRUCT_8,
+    ),
+}
+
+
+def getPrecisionProfile(precision: Union[str, PrecisionProfile] = None) -> PrecisionProfile:
+    """
+    Resolve `precision` to a profile. A preset name is looked up in `PRECISION_PRESETS`, and None gives the profile
+    made of the module level defaults.
+    """
+    if precision is None:
+        return PrecisionProfile(
+            cpu_prec,
+            cuda_prec,
+            cuda_prec_sloppy,
+            cuda_prec_precondition,
+            cuda_prec_eigensolver,
+            link_recon,
+            link_recon_sloppy,
+        )
+    elif isinstance(precision, str):
+        if precision not in PRECISION_PRESETS:
+            raise ValueError(f"Unknown precision preset {precision}")
+        return PRECISION_PRESETS[precision]
+    else:
+        return precision
+
+
+def newQudaGaugeParam(
+    lattice: LatticeInfo, tadpole_coeff: float, naik_epsilon: float, precision: PrecisionProfile = None
+):
+    precision = getPrecisionProfile(precision)
     gauge_param = QudaGaugeParam()
 
     gauge_param.X = lattice.size
@@ -105,18 +185,18 @@ def newQudaGaugeParam(lattice: LatticeInfo, tadpole_coeff: float, naik_epsilon:
     gauge_param.gauge_order = QudaGaugeFieldOrder.QUDA_QDP_GAUGE_ORDER
     gauge_param.t_boundary = lattice.t_boundary
 
-    gauge_param.cpu_prec = cpu_prec
-    gauge_param.cuda_prec = cuda_prec
-    gauge_param.cuda_prec_sloppy = cuda_prec_sloppy
-    gauge_param.cuda_prec_refinement_sloppy = cuda_prec_sloppy
-    gauge_param.cuda_prec_precondition = cuda_prec_precondition
-    gauge_param.cuda_prec_eigensolver = cuda_prec_eigensolver
+    gauge_param.cpu_prec = precision.cpu
+    gauge_param.cuda_prec = precision.cuda
+    gauge_param.cuda_prec_sloppy = precision.sloppy
+    gauge_param.cuda_prec_refinement_sloppy = precision.sloppy
+    gauge_param.cuda_prec_precondition = precision.precondition
+    gauge_param.cuda_prec_eigensolver = precision.eigensolver
 
-    gauge_param.reconstruct = link_recon
-    gauge_param.reconstruct_sloppy = link_recon_sloppy
-    gauge_param.reconstruct_refinement_sloppy = link_recon_sloppy
-    gauge_param.reconstruct_precondition = link_recon_sloppy
-    gauge_param.reconstruct_eigensolver = link_recon_sloppy
+    gauge_param.reconstruct = precision.reconstruct
+    gauge_param.reconstruct_sloppy = precision.reconstruct_sloppy
+    gauge_param.reconstruct_refinement_sloppy = precision.reconstruct_sloppy
+    gauge_param.reconstruct_precondition = precision.reconstruct_sloppy
+    gauge_param.reconstruct_eigensolver = precision.reconstruct_sloppy
 
     gauge_param.gauge_fix = QudaGaugeFixed.QUDA_GAUGE_FIXED_NO
     gauge_param.ga_pad = lattice.ga_pad
@@ -146,9 +226,11 @@ def newQudaMultigridParam(
     setup_maxiter: int,
     nu_pre: int,
     nu_post: int,
+    precision: PrecisionProfile = None,
 ):
     from .. import getCUDAComputeCapability
 
+    precision = getPrecisionProfile(precision)
     mg_param = QudaMultigridParam()
     mg_inv_param = QudaInvertParam()
 
@@ -166,19 +248,19 @@ def newQudaMultigridParam(
     mg_inv_param.maxiter = 10000
     mg_inv_param.reliable_delta = 1e-10
 
-    mg_inv_param.cpu_prec = cpu_prec
-    mg_inv_param.cuda_prec = cuda_prec
-    mg_inv_param.cuda_prec_sloppy = cuda_prec_sloppy
-    mg_inv_param.cuda_prec_precondition = cuda_prec_precondition
+    mg_inv_param.cpu_prec = precision.cpu
+    mg_inv_param.cuda_prec = precision.cuda
+    mg_inv_param.cuda_prec_sloppy = precision.sloppy
+    mg_inv_param.cuda_prec_precondition = precision.precondition
     mg_inv_param.preserve_source = QudaPreserveSource.QUDA_PRESERVE_SOURCE_NO
     mg_inv_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
     mg_inv_param.dirac_order = QudaDiracFieldOrder.QUDA_DIRAC_ORDER
     mg_inv_param.gamma_basis = QudaGammaBasis.QUDA_DEGRAND_ROSSI_GAMMA_BASIS
 
-    mg_inv_param.clover_cpu_prec = cpu_prec
-    mg_inv_param.clover_cuda_prec = cuda_prec
-    mg_inv_param.clover_cuda_prec_sloppy = cuda_prec_sloppy
-    mg_inv_param.clover_cuda_prec_precondition = cuda_prec_precondition
+    mg_inv_param.clover_cpu_prec = precision.cpu
+    mg_inv_param.clover_cuda_prec = precision.cuda
+    mg_inv_param.clover_cuda_prec_sloppy = precision.sloppy
+    mg_inv_param.clover_cuda_prec_precondition = precision.precondition
     mg_inv_param.clover_location = QudaFieldLocation.QUDA_CUDA_FIELD_LOCATION
     mg_inv_param.clover_order = QudaCloverFieldOrder.QUDA_FLOAT2_CLOVER_ORDER
     mg_inv_param.clover_coeff = 1.0
@@ -206,7 +288,7 @@ def newQudaMultigridParam(
     mg_param.spin_block_size = [2] + [1] * (QUDA_MAX_MG_LEVEL - 1)
     mg_param.n_vec = [24] * QUDA_MAX_MG_LEVEL
     mg_param.n_block_ortho = [1] * QUDA_MAX_MG_LEVEL
-    mg_param.precision_null = [cuda_prec_precondition] * QUDA_MAX_MG_LEVEL
+    mg_param.precision_null = [precision.precondition] * QUDA_MAX_MG_LEVEL
     mg_param.nu_pre = [nu_pre] * QUDA_MAX_MG_LEVEL
     mg_param.nu_post = [nu_post] * QUDA_MAX_MG_LEVEL
     mg_param.mu_factor = [1.0] * QUDA_MAX_MG_LEVEL
@@ -261,7 +343,9 @@ def newQudaInvertParam(
     clover_coeff: float,
     clover_anisotropy: float,
     mg_param: QudaMultigridParam = None,
+    precision: PrecisionProfile = None,
 ):
+    precision = getPrecisionProfile(precision)
     invert_param = QudaInvertParam()
 
     # invert_param.dslash_type = QudaDslashType.QUDA_CLOVER_WILSON_DSLASH
@@ -293,24 +377,27 @@ def newQudaInvertParam(
     # invert_param.solution_accumulator_pipeline = 0
     # invert_param.max_res_increase = 1
 
-    invert_param.cpu_prec = cpu_prec
-    invert_param.cuda_prec = cuda_prec
-    invert_param.cuda_prec_sloppy = cuda_prec_sloppy
-    invert_param.cuda_prec_refinement_sloppy = cuda_prec_sloppy
-    invert_param.cuda_prec_precondition = cuda_prec_precondition
-    invert_param.cuda_prec_eigensolver = cuda_prec_eigensolver
+    invert_param.cpu_prec = precision.cpu
+    invert_param.cuda_prec = precision.cuda
+    invert_param.cuda_prec_sloppy = precision.sloppy
+    invert_param.cuda_prec_refinement_sloppy = precision.sloppy
+    invert_param.cuda_prec_precondition = precision.precondition
+    invert_param.cuda_prec_eigensolver = precision.eigensolver
     invert_param.preserve_source = QudaPreserveSource.QUDA_PRESERVE_SOURCE_NO
     invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
+    invert_param.chrono_max_dim = 0
+    invert_param.chrono_index = 0
+    invert_param.chrono_precision = precision.sloppy
     invert_param.dirac_order = QudaDiracFieldOrder.QUDA_DIRAC_ORDER
     invert_param.gamma_basis = QudaGammaBasis.QUDA_DEGRAND_ROSSI_GAMMA_BASIS
 
     if clover_coeff != 0.0:
-        invert_param.clover_cpu_prec = cpu_prec
-        invert_param.clover_cuda_prec = cuda_prec
-        invert_param.clover_cuda_prec_sloppy = cuda_prec_sloppy
-        invert_param.clover_cuda_prec_refinement_sloppy = cuda_prec_sloppy
-        invert_param.clover_cuda_prec_precondition = cuda_prec_precondition
-        invert_param.clover_cuda_prec_eigensolver = cuda_prec_eigensolver
+        invert_param.clover_cpu_prec = precision.cpu
+        invert_param.clover_cuda_prec = precision.cuda
+        invert_param.clover_cuda_prec_sloppy = precision.sloppy
+        invert_param.clover_cuda_prec_refinement_sloppy = precision.sloppy
+        invert_param.clover_cuda_prec_precondition = precision.precondition
+        invert_param.clover_cuda_prec_eigensolver = precision.eigensolver
         invert_param.clover_location = QudaFieldLocation.QUDA_CUDA_FIELD_LOCATION
         invert_param.clover_order = QudaCloverFieldOrder.QUDA_FLOAT2_CLOVER_ORDER
         invert_param.clover_csw = clover_anisotropy  # to save clover_anisotropy, not real csw
@@ -341,11 +428,26 @@ def newQudaInvertParam(
     return invert_param
 
 
-def loadClover(gauge: LatticeGauge, gauge_param: QudaGaugeParam, invert_param: QudaInvertParam):
+def setChrono(invert_param: QudaInvertParam, max_dim: int, index: int):
+    use_chrono = 1 if max_dim > 0 else 0
+    invert_param.chrono_use_resident = use_chrono
+    invert_param.chrono_make_resident = use_chrono
+    invert_param.chrono_replace_last = 0
+    invert_param.chrono_max_dim = max_dim
+    invert_param.chrono_index = index
+
+
+def flushChrono(invert_param: QudaInvertParam):
+    if invert_param.chrono_max_dim > 0:
+        flushChronoQuda(invert_param.chrono_index)
+
+
+def _uploadClover(gauge: LatticeGauge, gauge_param: QudaGaugeParam, invert_param: QudaInvertParam):
     clover_anisotropy = invert_param.clover_csw
     anisotropy = gauge_param.anisotropy
     reconstruct = gauge_param.reconstruct
 
+    version = gauge.version
     gauge_data_bak = gauge.backup()
     if clover_anisotropy != 1.0:
         gauge.setAnisotropy(clover_anisotropy)
@@ -358,9 +460,11 @@ def loadClover(gauge: LatticeGauge, gauge_param: QudaGaugeParam, invert_param: Q
     gauge_param.anisotropy = anisotropy
     gauge_param.reconstruct = reconstruct
     gauge.data = gauge_data_bak
+    gauge.version = version
 
 
-def loadGauge(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
+def _uploadGauge(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
+    version = gauge.version
     gauge_data_bak = gauge.backup()
     if gauge_param.t_boundary == QudaTboundary.QUDA_ANTI_PERIODIC_T:
         gauge.setAntiPeroidicT()
@@ -370,9 +474,88 @@ def loadGauge(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
     loadGaugeQuda(gauge.data_ptrs, gauge_param)
     gauge_param.use_resident_gauge = 1
     gauge.data = gauge_data_bak
+    gauge.version = version
 
 
-def loadFatAndLong(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
+def _cloverLinkState(gauge_param: QudaGaugeParam):
+    # The links `_uploadClover` builds the clover term from, without the boundary sign and reconstruction.
+    return gaugeState(gauge_param)._replace(anisotropy=1.0, reconstruct=QudaReconstructType.QUDA_RECONSTRUCT_NO)
+
+
+def loadClover(gauge: LatticeGauge, gauge_param: QudaGaugeParam, invert_param: QudaInvertParam):
+    state = _cloverLinkState(gauge_param)
+    # The links are uploaded without the boundary sign, so they are not the ones `loadGauge` would upload.
+    states = {"links": ("clover", state), "clover": cloverState(state, invert_param)}
+    resident = getResident()
+    if resident.skip(gauge, states):
+        return
+    _uploadClover(gauge, gauge_param, invert_param)
+    resident.record(gauge, states)
+
+
+def loadGauge(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
+    """
+    Upload the links with the boundary sign and anisotropy of `gauge_param`. Nothing is uploaded if the same
+    version of `gauge` is already resident with the same parameters.
+    """
+    states = {"links": gaugeState(gauge_param)}
+    resident = getResident()
+    if resident.skip(gauge, states):
+        return
+    _uploadGauge(gauge, gauge_param)
+    resident.record(gauge, states)
+
+
+def loadCloverAndGauge(gauge: LatticeGauge, gauge_param: QudaGaugeParam, invert_param: QudaInvertParam):
+    """
+    Same as `loadClover` followed by `loadGauge`.
+
+    The clover term does not depend on the sign of the t links on the boundary, as every plaquette crossing the
+    boundary contains two of them. So if the clover anisotropy matches the gauge anisotropy, the links are
+    uploaded only once, with the reconstruction of `gauge_param`, and QUDA derives the clover term and its
+    inverse from the resident links. Otherwise the clover term needs differently scaled links, and both uploads
+    are done.
+    """
+    state = gaugeState(gauge_param)
+    if invert_param.clover_csw == gauge_param.anisotropy:
+        states = {"links": state, "clover": cloverState(state, invert_param)}
+    else:
+        states = {"links": state, "clover": cloverState(_cloverLinkState(gauge_param), invert_param)}
+    resident = getResident()
+    if resident.skip(gauge, states):
+        return
+    if invert_param.clover_csw == gauge_param.anisotropy:
+        _uploadGauge(gauge, gauge_param)
+        loadCloverQuda(nullptr, nullptr, invert_param)
+    else:
+        _uploadClover(gauge, gauge_param, invert_param)
+        _uploadGauge(gauge, gauge_param)
+    resident.record(gauge, states)
+
+
+def _loadKSLink(link: LatticeGauge, gauge_param: QudaGaugeParam, link_type: QudaLinkType):
+    gauge_param.type = link_type
+    if link_type == QudaLinkType.QUDA_ASQTAD_LONG_LINKS:
+        gauge_param.ga_pad = gauge_param.ga_pad * 3
+        # gauge_param.staggered_phase_type = QudaStaggeredPhase.QUDA_STAGGERED_PHASE_NO
+        loadGaugeQuda(link.data_ptrs, gauge_param)
+        gauge_param.ga_pad = gauge_param.ga_pad // 3
+    else:
+        loadGaugeQuda(link.data_ptrs, gauge_param)
+
+
+def loadFatAndLong(
+    gauge: LatticeGauge, gauge_param: QudaGaugeParam, link_cache: LinkCache = None, low_memory: bool = False
+):
+    """
+    Compute the HISQ fat and long links on the device and load them. The phased links are written into the buffer
+    that receives the fat links, so three temporary gauge fields are alive at most. With `low_memory` only two
+    are, at the price of a second pass of the fat link smearing, as the fat and long links are then computed one
+    after the other into the same buffer.
+
+    With `link_cache` the links are stored and reloaded, keyed by the gauge field and the path coefficients. The
+    cache is looked up first, and a hit only uploads the thin and the cached links.
+    """
     u1 = 1.0 / gauge_param.tadpole_coeff
     u2 = u1 * u1
     u4 = u2 * u2
@@ -408,113 +591,189 @@ def loadFatAndLong(gauge: LatticeGauge, gauge_param: QudaGaugeParam):
         "<f8",
     )
 
-    inlink = gauge.copy()
-    ulink = LatticeGauge(gauge.latt_info)
-    fatlink = LatticeGauge(gauge.latt_info)
-    longlink = LatticeGauge(gauge.latt_info)
+    gauge_param.type = QudaLinkType.QUDA_WILSON_LINKS
+    gauge_param.staggered_phase_applied = 0
+    state = ("hisq", gaugeState(gauge_param))
+    states = {"links": state, "fat_long": state}
+    resident = getResident()
+    if resident.skip(gauge, states):
+        gauge_param.type = QudaLinkType.QUDA_ASQTAD_LONG_LINKS
+        gauge_param.staggered_phase_applied = 1
+        gauge_param.use_resident_gauge = 1
+        return
+
+    key = None
+    if link_cache is not None:
+        key, meta = link_cache.key(gauge, gauge_param, act_path_coeff)
+        if link_cache.hit(key):
+            gauge_param.use_resident_gauge = 0
+            loadGaugeQuda(gauge.data_ptrs, gauge_param)  # Save the original gauge for the smeared source.
+            gauge_param.staggered_phase_applied = 1
+            _loadKSLink(link_cache.load(key, "fat", gauge.latt_info), gauge_param, QudaLinkType.QUDA_ASQTAD_FAT_LINKS)
+            _loadKSLink(link_cache.load(key, "long", gauge.latt_info), gauge_param, QudaLinkType.QUDA_ASQTAD_LONG_LINKS)
+            gauge_param.use_resident_gauge = 1
+            resident.record(gauge, states)
+            return
+        link_cache.reserve(key)
 
     gauge_param.use_resident_gauge = 0
-
-    loadGaugeQuda(inlink.data_ptrs, gauge_param)  # Save the original gauge for the smeared source.
+    loadGaugeQuda(gauge.data_ptrs, gauge_param)  # Save the original gauge for the smeared source.
 
     # t boundary will be applied by the staggered phase.
+    fatlink = gauge.copy()
     gauge_param.return_result_gauge = 1
-    staggeredPhaseQuda(inlink.data_ptrs, gauge_param)
+    staggeredPhaseQuda(fatlink.data_ptrs, gauge_param)
     gauge_param.return_result_gauge = 0
     gauge_param.staggered_phase_applied = 1
 
     # Chroma uses periodic boundary condition to do the SU(3) projection.
     # But I think it's wrong.
     # gauge_param.t_boundary = QudaTboundary.QUDA_PERIODIC_T
+    ulink = LatticeGauge(gauge.latt_info)
     computeKSLinkQuda(
         nullptrs,
         nullptrs,
         ulink.data_ptrs,
-        inlink.data_ptrs,
-        ndarrayDataPointer(act_path_coeff[0]),
-        gauge_param,
-    )
-    computeKSLinkQuda(
         fatlink.data_ptrs,
-        longlink.data_ptrs,
-        nullptrs,
-        ulink.data_ptrs,
-        ndarrayDataPointer(act_path_coeff[1]),
+        ndarrayDataPointer(act_path_coeff[0]),
         gauge_param,
     )
 
-    gauge_param.type = QudaLinkType.QUDA_ASQTAD_FAT_LINKS
-    loadGaugeQuda(fatlink.data_ptrs, gauge_param)
-    gauge_param.type = QudaLinkType.QUDA_ASQTAD_LONG_LINKS
-    gauge_param.ga_pad = gauge_param.ga_pad * 3
-    # gauge_param.staggered_phase_type = QudaStaggeredPhase.QUDA_STAGGERED_PHASE_NO
-    loadGaugeQuda(longlink.data_ptrs, gauge_param)
-    gauge_param.ga_pad = gauge_param.ga_pad / 3
+    # The phased links are not needed anymore, so the fat links overwrite them.
+    if low_memory:
+        passes = [(fatlink, None), (None, fatlink)]
+    else:
+        passes = [(fatlink, LatticeGauge(gauge.latt_info))]
+    for fat, long in passes:
+        computeKSLinkQuda(
+            fat.data_ptrs if fat is not None else nullptrs,
+            long.data_ptrs if long is not None else nullptrs,
+            nullptrs,
+            ulink.data_ptrs,
+            ndarrayDataPointer(act_path_coeff[1]),
+            gauge_param,
+        )
+        for name, link, link_type in (
+            ("fat", fat, QudaLinkType.QUDA_ASQTAD_FAT_LINKS),
+            ("long", long, QudaLinkType.QUDA_ASQTAD_LONG_LINKS),
+        ):
+            if link is not None:
+                if key is not None:
+                    link_cache.save(key, name, link)
+                _loadKSLink(link, gauge_param, link_type)
+    if key is not None:
+        link_cache.commit(key, meta)
 
     # These field created by QUDA's allocator will not be freed automatically
-    ulink = fatlink = longlink = None
+    fatlink = ulink = passes = fat = long = link = None
 
     gauge_param.use_resident_gauge = 1
+    resident.record(gauge, states)
 
 
-def invert(b: LatticeFermion, invert_param: QudaInvertParam):
-    x = LatticeFermion(b.latt_info)
+def invert(
+    b: LatticeFermion, invert_param: QudaInvertParam, x0: LatticeFermion = None, mg_param: QudaMultigridParam = None
+):
+    if x0 is None:
+        x = LatticeFermion(b.latt_info)
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
+    else:
+        x = x0.copy()
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_YES
 
     invertQuda(x.data_ptr, b.data_ptr, invert_param)
-    if getMPIRank() == 0 and invert_param.verbosity >= QudaVerbosity.QUDA_SUMMARIZE:
-        print(
-            "PyQuda: "
-            f"Time = {invert_param.secs:.3f} secs, "
-            f"Performance = {invert_param.gflops / invert_param.secs:.3f} GFLOPS"
-        )
+    getTelemetry().record(invert_param, mg_param)
 
     return x
 
 
-def invertStaggered(b: LatticeStaggeredFermion, invert_param: QudaInvertParam):
-    x = LatticeStaggeredFermion(b.latt_info)
+def invertStaggered(
+    b: LatticeStaggeredFermion,
+    invert_param: QudaInvertParam,
+    x0: LatticeStaggeredFermion = None,
+    mg_param: QudaMultigridParam = None,
+):
+    if x0 is None:
+        x = LatticeStaggeredFermion(b.latt_info)
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
+    else:
+        x = x0.copy()
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_YES
 
     invertQuda(x.data_ptr, b.data_ptr, invert_param)
-    if getMPIRank() == 0 and invert_param.verbosity >= QudaVerbosity.QUDA_SUMMARIZE:
-        print(
-            "PyQuda: "
-            f"Time = {invert_param.secs:.3f} secs, "
-            f"Performance = {invert_param.gflops / invert_param.secs:.3f} GFLOPS"
-        )
+    getTelemetry().record(invert_param, mg_param)
 
     return x
 
 
-def invertPC(b: LatticeFermion, invert_param: QudaInvertParam):
+def invertPC(
+    b: LatticeFermion,
+    invert_param: QudaInvertParam,
+    x0: LatticeFermion = None,
+    mg_param: QudaMultigridParam = None,
+    odd_only: bool = False,
+):
+    """
+    Solve the Schur complement on the odd sites and reconstruct the even sites from it. This works for both
+    Wilson and clover fermions, as the dslash of a clover operator with even-odd preconditioning includes the
+    inverse clover term. With `odd_only` only the odd checkerboard of the solution is returned as a
+    `LatticeHalfFermion`, and neither the full solution nor the reconstruction is computed.
+    """
+    solution_type = invert_param.solution_type
     invert_param.solution_type = QudaSolutionType.QUDA_MATPC_SOLUTION
 
     kappa = invert_param.kappa
+    clover = invert_param.dslash_type == QudaDslashType.QUDA_CLOVER_WILSON_DSLASH
+
+    if odd_only:
+        # Only half fields are allocated: the odd source, the odd solution and, for clover, the even source.
+        latt_info = b.latt_info
+        b_odd = LatticeHalfFermion(latt_info, 1)
+        x_odd = LatticeHalfFermion(latt_info, 1)
+        if clover:
+            b_even = LatticeHalfFermion(latt_info, 0)
+            cloverQuda(b_even.data_ptr, b.even_ptr, invert_param, QudaParity.QUDA_EVEN_PARITY, 1)
+            cloverQuda(b_odd.data_ptr, b.odd_ptr, invert_param, QudaParity.QUDA_ODD_PARITY, 1)
+            b_even_ptr = b_even.data_ptr
+        else:
+            b_odd.data[:] = b.odd
+            b_even_ptr = b.even_ptr
+        # x_odd is free until the solve, so use it for the dslash on the source.
+        dslashQuda(x_odd.data_ptr, b_even_ptr, invert_param, QudaParity.QUDA_ODD_PARITY)
+        b_odd.data[:] = b_odd.data + kappa * x_odd.data
+        b_even = None
+        if x0 is None:
+            invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
+        else:
+            x_odd.data[:] = x0.odd
+            invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_YES
+        invertQuda(x_odd.data_ptr, b_odd.data_ptr, invert_param)
+        invert_param.solution_type = solution_type
+        getTelemetry().record(invert_param, mg_param)
+        return x_odd
 
     x = LatticeFermion(b.latt_info)
-    tmp = LatticeFermion(b.latt_info)
-
-    # dslashQuda(x.odd_ptr, tmp.even_ptr, invert_param, QudaParity.QUDA_ODD_PARITY)
-    # tmp.odd = tmp.odd + kappa * x.odd
-    # tmp.even *= 2 * kappa
-    # invertQuda(x.odd_ptr, tmp.odd_ptr, invert_param)
-    # dslashQuda(x.even_ptr, x.odd_ptr, invert_param, QudaParity.QUDA_EVEN_PARITY)
-    # x.even = tmp.even + kappa * x.even
-
-    cloverQuda(tmp.even_ptr, b.even_ptr, invert_param, QudaParity.QUDA_EVEN_PARITY, 1)
-    cloverQuda(tmp.odd_ptr, b.odd_ptr, invert_param, QudaParity.QUDA_ODD_PARITY, 1)
-    dslashQuda(x.odd_ptr, tmp.even_ptr, invert_param, QudaParity.QUDA_ODD_PARITY)
-    tmp.odd = tmp.odd + kappa * x.odd
-    # QUDA_ASYMMETRIC_MASS_NORMALIZATION makes the even part 1 / (2 * kappa) instead of 1
-    tmp.even *= 2 * kappa
+    if clover:
+        tmp = LatticeFermion(b.latt_info)
+        cloverQuda(tmp.even_ptr, b.even_ptr, invert_param, QudaParity.QUDA_EVEN_PARITY, 1)
+        cloverQuda(tmp.odd_ptr, b.odd_ptr, invert_param, QudaParity.QUDA_ODD_PARITY, 1)
+    else:
+        tmp = b.copy()
+    # x.even is free until the reconstruction, so use it for the dslash on the source.
+    dslashQuda(x.even_ptr, tmp.even_ptr, invert_param, QudaParity.QUDA_ODD_PARITY)
+    tmp.odd = tmp.odd + kappa * x.even
+    if x0 is None:
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_NO
+    else:
+        x.odd = x0.odd
+        invert_param.use_init_guess = QudaUseInitGuess.QUDA_USE_INIT_GUESS_YES
     invertQuda(x.odd_ptr, tmp.odd_ptr, invert_param)
-    if getMPIRank() == 0 and invert_param.verbosity >= QudaVerbosity.QUDA_SUMMARIZE:
-        print(
-            "PyQuda: "
-            f"Time = {invert_param.secs:.3f} secs, "
-            f"Performance = {invert_param.gflops / invert_param.secs:.3f} GFLOPS"
-        )
+    invert_param.solution_type = solution_type
+    getTelemetry().record(invert_param, mg_param)
+
     dslashQuda(x.even_ptr, x.odd_ptr, invert_param, QudaParity.QUDA_EVEN_PARITY)
-    x.even = tmp.even + kappa * x.even
+    # QUDA_ASYMMETRIC_MASS_NORMALIZATION makes the even part 1 / (2 * kappa) instead of 1
+    x.even = 2 * kappa * tmp.even + kappa * x.even
 
     tmp = None
 
@@ -1,10 +1,20 @@
-from typing import List
+from typing import List, Union
 
-from ..pyquda import newMultigridQuda, destroyMultigridQuda
-from ..field import LatticeInfo, LatticeGauge, LatticeStaggeredFermion
-from ..enum_quda import QudaDslashType, QudaInverterType, QudaReconstructType, QudaSolveType, QudaPrecision
+from ..pyquda import destroyMultigridQuda
+from ..field import Nd, LatticeInfo, LatticeGauge, LatticeStaggeredFermion
+from ..enum_quda import (
+    QUDA_MAX_MG_LEVEL,
+    QudaDslashType,
+    QudaInverterType,
+    QudaReconstructType,
+    QudaSolutionType,
+    QudaSolveType,
+    QudaPrecision,
+    QudaTransferType,
+)
 
 from . import Dirac, general
+from .cache import LinkCache
 
 
 class HISQ(Dirac):
@@ -18,30 +28,25 @@ class HISQ(Dirac):
         tadpole_coeff: float = 1.0,
         naik_epsilon: float = 0.0,
         geo_block_size: List[List[int]] = None,
+        precision: Union[str, general.PrecisionProfile] = None,
     ) -> None:
         super().__init__(latt_info)
-        cuda_prec_sloppy = general.cuda_prec_sloppy
-        link_recon = general.link_recon
-        link_recon_sloppy = general.link_recon_sloppy
+        precision = general.getPrecisionProfile(precision)
         single_prec = QudaPrecision.QUDA_SINGLE_PRECISION
         recon_no = QudaReconstructType.QUDA_RECONSTRUCT_NO
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = single_prec  # Using half with multigrid doesn't work
-        if link_recon < recon_no or link_recon_sloppy < recon_no:
-            general.link_recon = recon_no
-            general.link_recon_sloppy = recon_no
+        if geo_block_size is not None and precision.sloppy < single_prec:
+            precision = precision._replace(sloppy=single_prec)  # Using half with multigrid doesn't work
+        if precision.reconstruct < recon_no or precision.reconstruct_sloppy < recon_no:
+            precision = precision._replace(reconstruct=recon_no, reconstruct_sloppy=recon_no)
+        self.precision = precision
         self.mg_instance = None
+        self.link_cache = None
         self.newQudaGaugeParam(tadpole_coeff, naik_epsilon)
         self.newQudaMultigridParam(geo_block_size, mass, kappa, 1e-1, 12, 5e-6, 1000, 0, 8)
         self.newQudaInvertParam(mass, kappa, tol, maxiter)
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = cuda_prec_sloppy
-        if link_recon < recon_no or link_recon_sloppy < recon_no:
-            general.link_recon = link_recon
-            general.link_recon_sloppy = link_recon_sloppy
 
     def newQudaGaugeParam(self, tadpole_coeff: float, naik_epsilon: float):
-        gauge_param = general.newQudaGaugeParam(self.latt_info, tadpole_coeff, naik_epsilon)
+        gauge_param = general.newQudaGaugeParam(self.latt_info, tadpole_coeff, naik_epsilon, self.precision)
         self.gauge_param = gauge_param
 
     def newQudaMultigridParam(
@@ -55,40 +60,81 @@ class HISQ(Dirac):
         setup_maxiter: int,
         nu_pre: int,
         nu_post: int,
+        n_vec: int = 64,
     ):
+        """
+        The first coarsening is the optimized Kahler-Dirac transfer with 3 vectors, which blocks 2^4 sites on its
+        own. It is prepended to `geo_block_size`, so the hierarchy has one level more than `geo_block_size`. Each
+        aggregation level after it uses `n_vec` null vectors.
+        """
         if geo_block_size is not None:
             mg_param, mg_inv_param = general.newQudaMultigridParam(
-                mass, kappa, geo_block_size, coarse_tol, coarse_maxiter, setup_tol, setup_maxiter, nu_pre, nu_post
+                mass,
+                kappa,
+                [[1, 1, 1, 1]] + geo_block_size,
+                coarse_tol,
+                coarse_maxiter,
+                setup_tol,
+                setup_maxiter,
+                nu_pre,
+                nu_post,
+                self.precision,
             )
             mg_inv_param.dslash_type = QudaDslashType.QUDA_ASQTAD_DSLASH
+            n_coarse = QUDA_MAX_MG_LEVEL - 1
+            mg_param.transfer_type = [QudaTransferType.QUDA_TRANSFER_OPTIMIZED_KD] + [
+                QudaTransferType.QUDA_TRANSFER_AGGREGATE
+            ] * n_coarse
+            mg_param.spin_block_size = [0] + [1] * n_coarse
+            mg_param.n_vec = [3] + [n_vec] * n_coarse
+            mg_param.setup_inv_type = [QudaInverterType.QUDA_CGNR_INVERTER] * QUDA_MAX_MG_LEVEL
+            mg_param.smoother = [QudaInverterType.QUDA_CA_GCR_INVERTER] * QUDA_MAX_MG_LEVEL
+            mg_param.smoother_solve_type = [QudaSolveType.QUDA_DIRECT_SOLVE] + [
+                QudaSolveType.QUDA_DIRECT_PC_SOLVE
+            ] * n_coarse
+            mg_param.coarse_grid_solution_type = [QudaSolutionType.QUDA_MAT_SOLUTION] + [
+                QudaSolutionType.QUDA_MATPC_SOLUTION
+            ] * n_coarse
         else:
             mg_param, mg_inv_param = None, None
         self.mg_param = mg_param
         self.mg_inv_param = mg_inv_param
 
     def newQudaInvertParam(self, mass: float, kappa: float, tol: float, maxiter: int):
-        invert_param = general.newQudaInvertParam(mass, kappa, tol, maxiter, 0.0, 1.0, self.mg_param)
+        invert_param = general.newQudaInvertParam(mass, kappa, tol, maxiter, 0.0, 1.0, self.mg_param, self.precision)
         if self.mg_param is not None:
             invert_param.dslash_type = QudaDslashType.QUDA_ASQTAD_DSLASH
             invert_param.inv_type = QudaInverterType.QUDA_GCR_INVERTER
-            invert_param.solve_type = QudaSolveType.QUDA_DIRECT_PC_SOLVE
+            invert_param.solve_type = QudaSolveType.QUDA_DIRECT_SOLVE
         else:
             invert_param.dslash_type = QudaDslashType.QUDA_ASQTAD_DSLASH
             invert_param.solve_type = QudaSolveType.QUDA_DIRECT_PC_SOLVE
         self.invert_param = invert_param
 
     def loadGauge(self, gauge: LatticeGauge):
-        general.loadFatAndLong(gauge, self.gauge_param)
-        if self.mg_param is not None:
-            if self.mg_instance is not None:
-                self.destroy()
-            self.mg_instance = newMultigridQuda(self.mg_param)
-            self.invert_param.preconditioner = self.mg_instance
+        self.flushChrono()
+        general.loadFatAndLong(gauge, self.gauge_param, self.link_cache)
+        self.setupMultigrid(gauge)
+
+    def setLinkCache(self, path: str, budget: int = 16 * 1024**3):
+        """
+        Reuse the fat and long links stored under `path` for a gauge field seen before, keeping at most `budget`
+        bytes on disk.
+        """
+        self.link_cache = LinkCache(path, budget)
+
+    def setMass(self, mass: float):
+        kappa = 1 / (2 * (mass + Nd))
+        self.updateMass(mass, kappa)
+
+    def setKappa(self, kappa: float):
+        mass = 1 / (2 * kappa) - Nd
+        self.updateMass(mass, kappa)
 
     def destroy(self):
         if self.mg_instance is not None:
             destroyMultigridQuda(self.mg_instance)
             self.mg_instance = None
 
-    def invert(self, b: LatticeStaggeredFermion):
-        return general.invertStaggered(b, self.invert_param)
+    def invert(self, b: LatticeStaggeredFermion, x0: LatticeStaggeredFermion = None):
+        return general.invertStaggered(b, self.invert_param, x0, self.mg_param)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from ..field import Ns, Nc, Nd, LatticeInfo, LatticeGauge
+from ..enum_quda import QudaPrecision
+
+from . import Dirac
+
+_PRECISION_BYTES = {
+    QudaPrecision.QUDA_QUARTER_PRECISION: 1,
+    QudaPrecision.QUDA_HALF_PRECISION: 2,
+    QudaPrecision.QUDA_SINGLE_PRECISION: 4,
+    QudaPrecision.QUDA_DOUBLE_PRECISION: 8,
+}
+
+
+def _freeze(value) -> Hashable:
+    if isinstance(value, LatticeInfo):
+        return (tuple(value.global_size), value.t_boundary, value.anisotropy)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    else:
+        return value
+
+
+def multigridBytes(dirac: Dirac) -> int:
+    """
+    An estimate of the device memory held by the multigrid instance of `dirac`: the null vectors and the coarse
+    operator of every level. The gauge field is shared by all operators and not counted.
+    """
+    if dirac.mg_param is None or dirac.mg_instance is None:
+        return 0
+    mg_param = dirac.mg_param
+    from .hisq import HISQ
+
+    volume = dirac.latt_info.volume
+    dof = Nc if isinstance(dirac, HISQ) else Ns * Nc
+    total = 0
+    for level in range(mg_param.n_level - 1):
+        n_vec = mg_param.n_vec[level]
+        precision = _PRECISION_BYTES.get(mg_param.precision_null[level], 4)
+        total += n_vec * volume * dof * 2 * precision
+        block = 1
+        for d in range(Nd):
+            block *= mg_param.geo_block_size[level][d]
+        volume //= block
+        dof = 2 * n_vec
+        total += (2 * Nd + 1) * volume * dof * dof * 2 * precision
+    return total
+
+
+class DiracPool:
+    """
+    Memoize Dirac operators by the factory, e.g. `core.getDirac`, and its arguments. When the multigrid
+    instances of the live operators take more than `budget` bytes of device memory, or there are more than
+    `maxsize` operators, the least recently used operators are destroyed and dropped from the pool. The multigrid
+    setup happens when the gauge field is loaded, so load it with `DiracPool.loadGauge` to keep the budget. A
+    reference kept outside the pool to an evicted operator must not be used to solve anymore.
+    """
+
+    def __init__(self, budget: int = 8 * 1024**3, maxsize: int = None) -> None:
+        self.budget = budget
+        self.maxsize = maxsize
+        self.pool: Dict[Hashable, Dirac] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, factory: Callable[..., Dirac], *args, **kwargs) -> Dirac:
+        key = (factory.__module__, factory.__qualname__, _freeze(args), _freeze(kwargs))
+        if key in self.pool:
+            self.hits += 1
+            self.pool.move_to_end(key)
+        else:
+            self.misses += 1
+            self.pool[key] = factory(*args, **kwargs)
+        dirac = self.pool[key]
+        self.trim(dirac)
+        return dirac
+
+    def getDirac(self, latt_info: LatticeInfo, *args, **kwargs) -> Dirac:
+        from ..core import getDirac
+
+        return self.get(getDirac, latt_info, *args, **kwargs)
+
+    def getStaggeredDirac(self, latt_info: LatticeInfo, *args, **kwargs) -> Dirac:
+        from ..core import getStaggeredDirac
+
+        return self.get(getStaggeredDirac, latt_info, *args, **kwargs)
+
+    def loadGauge(self, dirac: Dirac, gauge: LatticeGauge):
+        """
+        Load `gauge` into `dirac` and evict other operators if its multigrid setup exceeds the budget.
+        """
+        dirac.loadGauge(gauge)
+        self.trim(dirac)
+
+    def deviceBytes(self) -> int:
+        return sum(multigridBytes(dirac) for dirac in self.pool.values())
+
+    def trim(self, keep: Dirac = None):
+        """
+        Evict the least recently used operators other than `keep` until the pool fits in the budget and in
+        `maxsize`.
+        """
+        total = self.deviceBytes()
+        for key in list(self.pool.keys()):
+            if total <= self.budget and (self.maxsize is None or len(self.pool) <= self.maxsize):
+                break
+            dirac = self.pool[key]
+            if dirac is keep:
+                continue
+            total -= multigridBytes(dirac)
+            self.evict(key)
+
+    def evict(self, key: Hashable):
+        self.pool.pop(key).destroy()
+        self.evictions += 1
+
+    def clear(self):
+        """
+        Destroy and drop every operator. These are not counted as evictions.
+        """
+        for key in list(self.pool.keys()):
+            self.pool.pop(key).destroy()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.pool),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "device_bytes": self.deviceBytes(),
+        }
+
+
+_POOL = DiracPool()
+
+
+def getDiracPool() -> DiracPool:
+    return _POOL
+
+
+def setDiracPool(budget: int) -> DiracPool:
+    """
+    Replace the pool used by `getDiracPool`, destroying the operators of the old one.
+    """
+    global _POOL
+    _POOL.clear()
+    _POOL = DiracPool(budget)
+    return _POOL
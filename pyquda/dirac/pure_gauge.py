@@ -1,3 +1,5 @@
+from typing import Union
+
 from ..pyquda import (
     QudaGaugeParam,
     QudaGaugeSmearParam,
@@ -11,6 +13,7 @@ from ..field import LatticeInfo, LatticeGauge
 from ..enum_quda import QudaBoolean, QudaGaugeSmearType, QudaLinkType, QudaReconstructType
 
 from . import general
+from .resident import getResident, gaugeState
 
 
 class PureGauge:
@@ -19,23 +22,19 @@ class PureGauge:
     smear_param: QudaGaugeSmearParam
     obs_param: QudaGaugeObservableParam
 
-    def __init__(self, latt_info: LatticeInfo) -> None:
+    def __init__(self, latt_info: LatticeInfo, precision: Union[str, general.PrecisionProfile] = None) -> None:
         self.latt_info = LatticeInfo(latt_info.global_size, 1, 1.0)
-        link_recon = general.link_recon
-        link_recon_sloppy = general.link_recon_sloppy
+        precision = general.getPrecisionProfile(precision)
         recon_no = QudaReconstructType.QUDA_RECONSTRUCT_NO
-        if link_recon < recon_no or link_recon_sloppy < recon_no:
-            general.link_recon = recon_no
-            general.link_recon_sloppy = recon_no
+        if precision.reconstruct < recon_no or precision.reconstruct_sloppy < recon_no:
+            precision = precision._replace(reconstruct=recon_no, reconstruct_sloppy=recon_no)
+        self.precision = precision
         self.newQudaGaugeParam()
         self.newQudaGaugeSmearParam()
         self.newQudaGaugeObservableParam()
-        if link_recon < recon_no or link_recon_sloppy < recon_no:
-            general.link_recon = link_recon
-            general.link_recon_sloppy = link_recon_sloppy
 
     def newQudaGaugeParam(self):
-        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0)
+        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0, self.precision)
         self.gauge_param = gauge_param
 
     def newQudaGaugeSmearParam(self):
@@ -47,14 +46,21 @@ class PureGauge:
         self.obs_param = obs_param
 
     def loadGauge(self, gauge: LatticeGauge):
+        # Periodic and isotropic, so this is the same upload as `general.loadGauge` with these parameters.
+        states = {"links": gaugeState(self.gauge_param)}
+        resident = getResident()
+        if resident.skip(gauge, states):
+            return
         self.gauge_param.use_resident_gauge = 0
         loadGaugeQuda(gauge.data_ptrs, self.gauge_param)
         self.gauge_param.use_resident_gauge = 1
+        resident.record(gauge, states)
 
     def saveSmearedGauge(self, gauge: LatticeGauge):
         self.gauge_param.type = QudaLinkType.QUDA_SMEARED_LINKS
         saveGaugeQuda(gauge.data_ptrs, self.gauge_param)
         self.gauge_param.type = QudaLinkType.QUDA_WILSON_LINKS
+        gauge.touch()
 
     def smearAPE(self, n_steps: int, alpha: float, dir: int):
         self.smear_param.n_steps = n_steps
@@ -66,6 +72,7 @@ class PureGauge:
             raise NotImplementedError("Applying APE in 4 dimensions not implemented")
         self.obs_param.compute_qcharge = QudaBoolean.QUDA_BOOLEAN_TRUE
         performGaugeSmearQuda(self.smear_param, self.obs_param)
+        getResident().invalidate("smeared")
         self.obs_param.compute_qcharge = QudaBoolean.QUDA_BOOLEAN_FALSE
 
     def smearSTOUT(self, n_steps: int, rho: float, dir: int):
@@ -79,6 +86,7 @@ class PureGauge:
             self.smear_param.smear_type = QudaGaugeSmearType.QUDA_GAUGE_SMEAR_OVRIMP_STOUT
         self.obs_param.compute_qcharge = QudaBoolean.QUDA_BOOLEAN_TRUE
         performGaugeSmearQuda(self.smear_param, self.obs_param)
+        getResident().invalidate("smeared")
         self.obs_param.compute_qcharge = QudaBoolean.QUDA_BOOLEAN_FALSE
 
     def plaquette(self):
@@ -0,0 +1,106 @@
+import weakref
+from typing import Dict, NamedTuple, Tuple
+
+from ..pyquda import QudaGaugeParam, QudaInvertParam
+from ..field import LatticeField
+from ..enum_quda import QudaLinkType, QudaTboundary, QudaPrecision, QudaReconstructType
+
+
+class GaugeState(NamedTuple):
+    type: QudaLinkType
+    t_boundary: QudaTboundary
+    anisotropy: float
+    tadpole_coeff: float
+    staggered_phase_applied: int
+    cuda_prec: QudaPrecision
+    cuda_prec_sloppy: QudaPrecision
+    cuda_prec_precondition: QudaPrecision
+    cuda_prec_eigensolver: QudaPrecision
+    reconstruct: QudaReconstructType
+    reconstruct_sloppy: QudaReconstructType
+    reconstruct_precondition: QudaReconstructType
+    reconstruct_eigensolver: QudaReconstructType
+
+
+def gaugeState(gauge_param: QudaGaugeParam) -> GaugeState:
+    return GaugeState(*[getattr(gauge_param, name) for name in GaugeState._fields])
+
+
+def cloverState(gauge_state: GaugeState, invert_param: QudaInvertParam) -> Tuple:
+    return (
+        gauge_state,
+        invert_param.clover_csw,
+        invert_param.clover_coeff,
+        invert_param.clover_cuda_prec,
+        invert_param.clover_cuda_prec_sloppy,
+        invert_param.clover_cuda_prec_precondition,
+        invert_param.clover_cuda_prec_eigensolver,
+        invert_param.compute_clover_inverse,
+    )
+
+
+class _Entry(NamedTuple):
+    field: weakref.ref
+    version: int
+    state: Tuple
+
+
+class ResidentRegistry:
+    """
+    Track which host field QUDA holds in each resident slot, e.g. "links", "fat_long", "clover", "smeared" or
+    "momentum", and with which parameters.
+
+    A field is identified by the object itself and its `version`, which is bumped by `LatticeField.touch` and by
+    assigning `LatticeField.data`. Writes into `data` in place are not seen, so they have to call `touch()`. An
+    upload of the same field, version and state as the resident one is skipped. Every QUDA call that changes a
+    slot without going through an upload has to `invalidate` it.
+    """
+
+    def __init__(self) -> None:
+        self.slots: Dict[str, _Entry] = {}
+        self.uploads: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def isResident(self, slot: str, field: LatticeField, state: Tuple) -> bool:
+        entry = self.slots.get(slot)
+        return entry is not None and entry.field() is field and entry.version == field.version and entry.state == state
+
+    def skip(self, field: LatticeField, states: Dict[str, Tuple]) -> bool:
+        """
+        Whether every slot in `states` already holds `field` with the given state. The upload is counted as
+        skipped or done for each of the slots.
+        """
+        skip = all(self.isResident(slot, field, state) for slot, state in states.items())
+        counter = self.skipped if skip else self.uploads
+        for slot in states:
+            counter[slot] = counter.get(slot, 0) + 1
+        return skip
+
+    def record(self, field: LatticeField, states: Dict[str, Tuple]):
+        for slot, state in states.items():
+            self.slots[slot] = _Entry(weakref.ref(field), field.version, state)
+
+    def invalidate(self, *slots: str):
+        """
+        Forget the resident fields of `slots`, or of all slots if none is given.
+        """
+        if len(slots) == 0:
+            self.slots.clear()
+        for slot in slots:
+            self.slots.pop(slot, None)
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """
+        The number of uploads done and skipped per slot.
+        """
+        return {
+            slot: {"uploads": self.uploads.get(slot, 0), "skipped": self.skipped.get(slot, 0)}
+            for slot in sorted(set(self.uploads) | set(self.skipped))
+        }
+
+
+_RESIDENT = ResidentRegistry()
+
+
+def getResident() -> ResidentRegistry:
+    return _RESIDENT
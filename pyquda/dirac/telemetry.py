@@ -0,0 +1,114 @@
+import json
+from collections import deque
+from time import time
+from typing import Dict, List
+
+from .. import getMPIRank, getMPISize
+from ..pyquda import QudaInvertParam, QudaMultigridParam
+from ..enum_quda import QudaDslashType, QudaInverterType, QudaSolveType, QudaVerbosity
+
+
+class SolverTelemetry:
+    """
+    Keep one entry per solve in a ring buffer of `capacity` entries and, if `path` is given, append it to a
+    JSON-lines file. Only rank 0 records, as the solver statistics are the same on every rank.
+
+    The summary is accumulated over the whole job and is not limited by the capacity of the ring buffer.
+    """
+
+    def __init__(self, capacity: int = 1024, path: str = None) -> None:
+        self.entries = deque(maxlen=capacity)
+        self.path = path
+        self.totals: Dict[str, Dict[str, float]] = {}
+
+    def record(self, invert_param: QudaInvertParam, mg_param: QudaMultigridParam = None, operator: str = None):
+        if getMPIRank() != 0:
+            return
+        if operator is None:
+            operator = QudaDslashType(invert_param.dslash_type).name[5:-7].lower()
+        entry = {
+            "time": time(),
+            "operator": operator,
+            "inverter": QudaInverterType(invert_param.inv_type).name[5:-9].lower(),
+            "solve_type": QudaSolveType(invert_param.solve_type).name[5:-6].lower(),
+            "mass": invert_param.mass,
+            "kappa": invert_param.kappa,
+            "tol": invert_param.tol,
+            "iter": invert_param.iter,
+            "true_res": invert_param.true_res,
+            "secs": invert_param.secs,
+            "gflop": invert_param.gflops,
+            "gflops": invert_param.gflops / invert_param.secs if invert_param.secs > 0 else 0.0,
+            "gpus": getMPISize(),
+        }
+        if mg_param is not None:
+            n_level = mg_param.n_level
+            entry["multigrid"] = {
+                "n_level": n_level,
+                "setup_secs": list(mg_param.secs[:n_level]),
+                "setup_gflop": list(mg_param.gflops[:n_level]),
+                "coarse_solver_tol": list(mg_param.coarse_solver_tol[: n_level - 1]),
+                "coarse_solver_maxiter": list(mg_param.coarse_solver_maxiter[: n_level - 1]),
+            }
+        self.entries.append(entry)
+
+        total = self.totals.setdefault(
+            operator,
+            {"count": 0, "iter": 0, "secs": 0.0, "gflop": 0.0, "max_iter": 0, "max_secs": 0.0, "max_true_res": 0.0},
+        )
+        total["count"] += 1
+        total["iter"] += entry["iter"]
+        total["secs"] += entry["secs"]
+        total["gflop"] += entry["gflop"]
+        total["max_iter"] = max(total["max_iter"], entry["iter"])
+        total["max_secs"] = max(total["max_secs"], entry["secs"])
+        total["max_true_res"] = max(total["max_true_res"], entry["true_res"])
+
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        if invert_param.verbosity >= QudaVerbosity.QUDA_SUMMARIZE:
+            print(f"PyQuda: Time = {invert_param.secs:.3f} secs, Performance = {entry['gflops']:.3f} GFLOPS")
+
+    def last(self, n: int = 1) -> List[dict]:
+        return list(self.entries)[-n:]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per operator: the number of solves, the mean and maximum iterations and seconds, the total seconds, the
+        overall GFLOPS and the largest true residual. Empty on ranks other than 0.
+        """
+        ret = {}
+        for operator, total in self.totals.items():
+            count = total["count"]
+            ret[operator] = {
+                "count": count,
+                "mean_iter": total["iter"] / count,
+                "max_iter": total["max_iter"],
+                "total_secs": total["secs"],
+                "mean_secs": total["secs"] / count,
+                "max_secs": total["max_secs"],
+                "gflops": total["gflop"] / total["secs"] if total["secs"] > 0 else 0.0,
+                "max_true_res": total["max_true_res"],
+            }
+        return ret
+
+    def clear(self):
+        self.entries.clear()
+        self.totals.clear()
+
+
+_TELEMETRY = SolverTelemetry()
+
+
+def getTelemetry() -> SolverTelemetry:
+    return _TELEMETRY
+
+
+def setTelemetry(capacity: int = 1024, path: str = None) -> SolverTelemetry:
+    """
+    Replace the telemetry sink used by all solves, writing JSON lines to `path` if it is given.
+    """
+    global _TELEMETRY
+    _TELEMETRY = SolverTelemetry(capacity, path)
+    return _TELEMETRY
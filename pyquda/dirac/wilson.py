@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Literal, Union
 
-from ..pyquda import newMultigridQuda, destroyMultigridQuda
-from ..field import LatticeInfo, LatticeGauge, LatticeFermion
+from ..pyquda import destroyMultigridQuda
+from ..field import Nd, LatticeInfo, LatticeGauge, LatticeFermion
 from ..enum_quda import QudaDslashType, QudaInverterType, QudaSolveType, QudaPrecision
 
 from . import Dirac, general
@@ -16,21 +16,23 @@ class Wilson(Dirac):
         tol: float,
         maxiter: int,
         geo_block_size: List[List[int]] = None,
+        precision: Union[str, general.PrecisionProfile] = None,
+        solve_mode: Literal["direct", "schur", "schur_odd"] = "direct",
     ) -> None:
         super().__init__(latt_info)
-        cuda_prec_sloppy = general.cuda_prec_sloppy
+        precision = general.getPrecisionProfile(precision)
         single_prec = QudaPrecision.QUDA_SINGLE_PRECISION
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = single_prec  # Using half with multigrid doesn't work
+        if geo_block_size is not None and precision.sloppy < single_prec:
+            precision = precision._replace(sloppy=single_prec)  # Using half with multigrid doesn't work
+        self.precision = precision
+        self.solve_mode = solve_mode
         self.mg_instance = None
         self.newQudaGaugeParam()
         self.newQudaMultigridParam(geo_block_size, mass, kappa, 1e-1, 12, 5e-6, 1000, 0, 8)
         self.newQudaInvertParam(mass, kappa, tol, maxiter)
-        if geo_block_size is not None and cuda_prec_sloppy < single_prec:
-            general.cuda_prec_sloppy = cuda_prec_sloppy
 
     def newQudaGaugeParam(self):
-        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0)
+        gauge_param = general.newQudaGaugeParam(self.latt_info, 1.0, 0.0, self.precision)
         self.gauge_param = gauge_param
 
     def newQudaMultigridParam(
@@ -47,7 +49,16 @@ class Wilson(Dirac):
     ):
         if geo_block_size is not None:
             mg_param, mg_inv_param = general.newQudaMultigridParam(
-                mass, kappa, geo_block_size, coarse_tol, coarse_maxiter, setup_tol, setup_maxiter, nu_pre, nu_post
+                mass,
+                kappa,
+                geo_block_size,
+                coarse_tol,
+                coarse_maxiter,
+                setup_tol,
+                setup_maxiter,
+                nu_pre,
+                nu_post,
+                self.precision,
             )
             mg_inv_param.dslash_type = QudaDslashType.QUDA_WILSON_DSLASH
         else:
@@ -56,7 +67,7 @@ class Wilson(Dirac):
         self.mg_inv_param = mg_inv_param
 
     def newQudaInvertParam(self, mass: float, kappa: float, tol: float, maxiter: int):
-        invert_param = general.newQudaInvertParam(mass, kappa, tol, maxiter, 0.0, 1.0, self.mg_param)
+        invert_param = general.newQudaInvertParam(mass, kappa, tol, maxiter, 0.0, 1.0, self.mg_param, self.precision)
         if self.mg_param is not None:
             invert_param.dslash_type = QudaDslashType.QUDA_WILSON_DSLASH
             invert_param.inv_type = QudaInverterType.QUDA_GCR_INVERTER
@@ -66,17 +77,33 @@ class Wilson(Dirac):
         self.invert_param = invert_param
 
     def loadGauge(self, gauge: LatticeGauge):
+        self.flushChrono()
         general.loadGauge(gauge, self.gauge_param)
-        if self.mg_param is not None:
-            if self.mg_instance is not None:
-                self.destroy()
-            self.mg_instance = newMultigridQuda(self.mg_param)
-            self.invert_param.preconditioner = self.mg_instance
+        self.setupMultigrid(gauge)
+
+    def setMass(self, mass: float):
+        kappa = 1 / (2 * (mass + 1 + (Nd - 1) / self.latt_info.anisotropy))
+        self.updateMass(mass, kappa)
+
+    def setKappa(self, kappa: float):
+        mass = 1 / (2 * kappa) - 1 - (Nd - 1) / self.latt_info.anisotropy
+        self.updateMass(mass, kappa)
 
     def destroy(self):
         if self.mg_instance is not None:
             destroyMultigridQuda(self.mg_instance)
             self.mg_instance = None
 
-    def invert(self, b: LatticeFermion):
-        return general.invert(b, self.invert_param)
+    def invert(self, b: LatticeFermion, x0: LatticeFermion = None):
+        """
+        With `solve_mode="schur"` the odd sites are solved with the Schur complement and the even sites are
+        reconstructed in PyQuda, and `solve_mode="schur_odd"` returns only the odd checkerboard of the solution.
+        """
+        if self.solve_mode == "direct":
+            return general.invert(b, self.invert_param, x0, self.mg_param)
+        elif self.solve_mode == "schur":
+            return general.invertPC(b, self.invert_param, x0, self.mg_param)
+        elif self.solve_mode == "schur_odd":
+            return general.invertPC(b, self.invert_param, x0, self.mg_param, True)
+        else:
+            raise ValueError(f"Unsupported solve mode {self.solve_mode}")
@@ -108,6 +108,8 @@ def newLatticeFieldData(latt_info: LatticeInfo, dtype: str):
             return cupy.zeros((2, Lt, Lz, Ly, Lx // 2, Nc), "<c16")
         elif dtype == "Fermion":
             return cupy.zeros((2, Lt, Lz, Ly, Lx // 2, Ns, Nc), "<c16")
+        elif dtype == "HalfFermion":
+            return cupy.zeros((Lt, Lz, Ly, Lx // 2, Ns, Nc), "<c16")
         elif dtype == "Propagator":
             return cupy.zeros((2, Lt, Lz, Ly, Lx // 2, Ns, Ns, Nc, Nc), "<c16")
         elif dtype == "StaggeredFermion":
@@ -127,6 +129,8 @@ def newLatticeFieldData(latt_info: LatticeInfo, dtype: str):
             return torch.zeros((2, Lt, Lz, Ly, Lx // 2, Nc), dtype=torch.complex128, device="cuda")
         elif dtype == "Fermion":
             return torch.zeros((2, Lt, Lz, Ly, Lx // 2, Ns, Nc), dtype=torch.complex128, device="cuda")
+        elif dtype == "HalfFermion":
+            return torch.zeros((Lt, Lz, Ly, Lx // 2, Ns, Nc), dtype=torch.complex128, device="cuda")
         elif dtype == "Propagator":
             return torch.zeros((2, Lt, Lz, Ly, Lx // 2, Ns, Ns, Nc, Nc), dtype=torch.complex128, device="cuda")
         elif dtype == "StaggeredFermion":
@@ -142,6 +146,23 @@ def newLatticeFieldData(latt_info: LatticeInfo, dtype: str):
 class LatticeField:
     def __init__(self, latt_info: LatticeInfo) -> None:
         self.latt_info = latt_info
+        self.version = 0
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self.touch()
+
+    def touch(self):
+        """
+        Mark the data as modified, so it is uploaded to QUDA again even if it is resident. Assigning `data` does
+        this already, but every write into `data` in place has to be followed by `touch()`.
+        """
+        self.version += 1
 
     def backup(self):
         from . import getCUDABackend
@@ -214,9 +235,11 @@ class LatticeGauge(LatticeField):
     def setAntiPeroidicT(self):
         if self.latt_info.gt == self.latt_info.Gt - 1:
             self.data[Nd - 1, :, self.latt_info.Lt - 1] *= -1
+        self.touch()
 
     def setAnisotropy(self, anisotropy: float):
         self.data[: Nd - 1] /= anisotropy
+        self.touch()
 
     @property
     def data_ptr(self):
@@ -273,6 +296,9 @@ class LatticeFermion(LatticeField):
         else:
             self.data = value.reshape(2, Lt, Lz, Ly, Lx // 2, Ns, Nc)
 
+    def copy(self):
+        return LatticeFermion(self.latt_info, self.backup())
+
     @property
     def even(self):
         return self.data[0]
@@ -305,6 +331,28 @@ class LatticeFermion(LatticeField):
         return lexico(self.getHost(), [0, 1, 2, 3, 4])
 
 
+class LatticeHalfFermion(LatticeField):
+    """
+    The fermion field on the sites of one parity, 0 for even and 1 for odd.
+    """
+
+    def __init__(self, latt_info: LatticeInfo, parity: Literal[0, 1], value=None) -> None:
+        super().__init__(latt_info)
+        Lx, Ly, Lz, Lt = latt_info.size
+        self.parity = parity
+        if value is None:
+            self.data = newLatticeFieldData(latt_info, "HalfFermion")
+        else:
+            self.data = value.reshape(Lt, Lz, Ly, Lx // 2, Ns, Nc)
+
+    def copy(self):
+        return LatticeHalfFermion(self.latt_info, self.parity, self.backup())
+
+    @property
+    def data_ptr(self):
+        return ndarrayDataPointer(self.data.reshape(-1), True)
+
+
 class LatticePropagator(LatticeField):
     def __init__(self, latt_info: LatticeInfo, value=None) -> None:
         super().__init__(latt_info)
@@ -330,6 +378,9 @@ class LatticeStaggeredFermion(LatticeField):
         else:
             self.data = value.reshape(2, Lt, Lz, Ly, Lx // 2, Nc)
 
+    def copy(self):
+        return LatticeStaggeredFermion(self.latt_info, self.backup())
+
     @property
     def even(self):
         return self.data[0]
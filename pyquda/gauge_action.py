@@ -0,0 +1,111 @@
+from typing import List, Sequence
+
+import numpy
+
+from .pointer import ndarrayDataPointer
+from .field import Nc, Nd
+
+
+def _plaquettes() -> List[List[int]]:
+    return [[mu, nu, 7 - mu, 7 - nu] for mu in range(Nd) for nu in range(mu + 1, Nd)]
+
+
+def _rectangles() -> List[List[int]]:
+    return [[mu, nu, nu, 7 - mu, 7 - nu, 7 - nu] for mu in range(Nd) for nu in range(Nd) if mu != nu]
+
+
+class GaugeAction:
+    """
+    A gauge action given by closed loops and their coefficients, in the convention of QUDA:
+    direction mu < 4 is a step forward and 7 - mu a step backward, and the action is beta / Nc times the sum of
+    the coefficients times the real trace of the loops.
+
+    The loop table for the action and the path table for the force, i.e. every loop with one link removed, are
+    built and checked once, and the pointers passed to QUDA are cached.
+    """
+
+    def __init__(self, paths: Sequence[Sequence[int]], coeffs: Sequence[float], beta: float) -> None:
+        if len(paths) != len(coeffs):
+            raise ValueError(f"Got {len(paths)} paths but {len(coeffs)} coefficients")
+        for path in paths:
+            displacement = numpy.zeros(Nd, "<i4")
+            for step in path:
+                if not 0 <= step < 2 * Nd:
+                    raise ValueError(f"Direction {step} of path {path} is not in [0, {2 * Nd})")
+                if step < Nd:
+                    displacement[step] += 1
+                else:
+                    displacement[7 - step] -= 1
+            if len(path) < 2 or displacement.any():
+                raise ValueError(f"Path {path} is not a closed loop")
+        self.beta = beta
+
+        self.num_paths = len(paths)
+        self.max_length = max(len(path) for path in paths)
+        self.lengths = numpy.array([len(path) for path in paths], "<i4")
+        self.coeffs = numpy.array(coeffs, "<f8") * beta / Nc
+        self.paths = -numpy.ones((self.num_paths, self.max_length), "<i4")
+        for i, path in enumerate(paths):
+            self.paths[i, : len(path)] = path
+
+        force = [[] for _ in range(Nd)]
+        fcoeffs = [[] for _ in range(Nd)]
+        flengths = [[] for _ in range(Nd)]
+        for i, path in enumerate(paths):
+            loop = numpy.array(path)
+            loop_dag = numpy.flip(7 - loop)
+            length = len(path)
+            for j in range(length):
+                if loop[j] < Nd:
+                    mu, fpath = loop[j], numpy.roll(loop, -j)[1:]
+                else:
+                    mu, fpath = loop_dag[length - 1 - j], numpy.roll(loop_dag, j + 1 - length)[1:]
+                force[mu].append(fpath)
+                fcoeffs[mu].append(-self.coeffs[i])
+                flengths[mu].append(length - 1)
+        if not all(flengths[mu] == flengths[0] and fcoeffs[mu] == fcoeffs[0] for mu in range(Nd)):
+            raise ValueError("The loops are not symmetric under the exchange of directions")
+        self.num_fpaths = len(flengths[0])
+        self.flengths = numpy.array(flengths[0], "<i4")
+        self.fcoeffs = numpy.array(fcoeffs[0], "<f8")
+        self.force_paths = -numpy.ones((Nd, self.num_fpaths, self.max_length - 1), "<i4")
+        for mu in range(Nd):
+            for i, fpath in enumerate(force[mu]):
+                self.force_paths[mu, i, : len(fpath)] = fpath
+
+        self.paths_ptr = ndarrayDataPointer(self.paths)
+        self.lengths_ptr = ndarrayDataPointer(self.lengths)
+        self.coeffs_ptr = ndarrayDataPointer(self.coeffs)
+        self.force_paths_ptr = ndarrayDataPointer(self.force_paths)
+        self.flengths_ptr = ndarrayDataPointer(self.flengths)
+        self.fcoeffs_ptr = ndarrayDataPointer(self.fcoeffs)
+
+
+def rectangleAction(beta: float, c1: float) -> GaugeAction:
+    """
+    Plaquettes and 1x2 rectangles with the usual normalization c0 + 8 c1 = 1.
+    """
+    c0 = 1 - 8 * c1
+    plaquettes, rectangles = _plaquettes(), _rectangles()
+    if c1 == 0.0:
+        return GaugeAction(plaquettes, [-c0] * len(plaquettes), beta)
+    return GaugeAction(plaquettes + rectangles, [-c0] * len(plaquettes) + [-c1] * len(rectangles), beta)
+
+
+def wilson(beta: float) -> GaugeAction:
+    return rectangleAction(beta, 0.0)
+
+
+def symanzik(beta: float) -> GaugeAction:
+    """
+    Tree-level Symanzik (Luscher-Weisz) action.
+    """
+    return rectangleAction(beta, -1 / 12)
+
+
+def iwasaki(beta: float) -> GaugeAction:
+    return rectangleAction(beta, -0.331)
+
+
+def dbw2(beta: float) -> GaugeAction:
+    return rectangleAction(beta, -1.4088)
@@ -1,4 +1,5 @@
-from typing import Literal
+from abc import ABC, abstractmethod
+from typing import Callable, List, Literal, Sequence, Union
 
 import numpy
 
@@ -15,6 +16,7 @@ from .pyquda import (
     updateGaugeFieldQuda,
     MatQuda,
     invertQuda,
+    invertMultiShiftQuda,
     projectSU3Quda,
     momResidentQuda,
     gaussMomQuda,
@@ -36,8 +38,12 @@ from .enum_quda import (
     QudaTboundary,
     QudaReconstructType,
     QudaDagType,
+    QUDA_MAX_MULTI_SHIFT,
 )
+from . import getMPIComm
 from .core import getDirac
+from .gauge_action import GaugeAction
+from .dirac.resident import getResident, gaugeState
 
 nullptr = Pointers("void", 0)
 
@@ -57,6 +63,10 @@ class HMC:
         self.dirac = getDirac(latt_info, mass, tol, maxiter, clover_coeff_t=clover_coeff)
 
         self.latt_info = latt_info
+        self.mass = mass
+        self.tol = tol
+        self.maxiter = maxiter
+        self.clover_coeff = clover_coeff
         self.updated_clover = False
         self.gauge_param: QudaGaugeParam = self.dirac.gauge_param
         self.invert_param: QudaInvertParam = self.dirac.invert_param
@@ -79,24 +89,36 @@ class HMC:
             self.smear_param.smear_type = QudaGaugeSmearType.QUDA_GAUGE_SMEAR_OVRIMP_STOUT
 
         self.obs_param.compute_qcharge = QudaBoolean.QUDA_BOOLEAN_TRUE
+        self.gauge_action: GaugeAction = None
 
     def loadGauge(self, gauge: LatticeGauge):
+        # The anisotropy is not applied here, unlike `general.loadGauge`.
+        states = {"links": ("hmc", gaugeState(self.gauge_param))}
+        resident = getResident()
+        self.updated_clover = False
+        if resident.skip(gauge, states):
+            return
         gauge_in = gauge.copy()
         if self.gauge_param.t_boundary == QudaTboundary.QUDA_ANTI_PERIODIC_T:
             gauge_in.setAntiPeroidicT()
         self.gauge_param.use_resident_gauge = 0
         loadGaugeQuda(gauge_in.data_ptrs, self.gauge_param)
         self.gauge_param.use_resident_gauge = 1
-        self.updated_clover = False
+        resident.record(gauge, states)
 
     def saveGauge(self, gauge: LatticeGauge):
         saveGaugeQuda(gauge.data_ptrs, self.gauge_param)
         if self.gauge_param.t_boundary == QudaTboundary.QUDA_ANTI_PERIODIC_T:
             gauge.setAntiPeroidicT()
+        gauge.touch()
+        if self.gauge_param.type == QudaLinkType.QUDA_WILSON_LINKS:
+            # Loading `gauge` back now would give the same resident links.
+            getResident().record(gauge, {"links": ("hmc", gaugeState(self.gauge_param))})
 
     def updateGaugeField(self, dt: float):
         updateGaugeFieldQuda(nullptr, nullptr, dt, False, False, self.gauge_param)
         loadGaugeQuda(nullptr, self.gauge_param)
+        getResident().invalidate("links", "clover")
         self.updated_clover = False
 
     def computeCloverForce(self, dt, x: LatticeFermion, kappa2, ck):
@@ -119,6 +141,7 @@ class HMC:
             self.invert_param,
         )
         self.invert_param.dagger = QudaDagType.QUDA_DAG_NO
+        getResident().invalidate("momentum")
 
     def computeGaugeForce(self, dt, force, lengths, coeffs, num_paths, max_length):
         computeGaugeForceQuda(
@@ -132,32 +155,96 @@ class HMC:
             dt,
             self.gauge_param,
         )
+        getResident().invalidate("momentum")
+
+    def setGaugeAction(self, gauge_action: GaugeAction):
+        self.gauge_action = gauge_action
+
+    def gaugeForce(self, dt: float):
+        """
+        Update the momentum with the force of the gauge action set by `setGaugeAction`.
+        """
+        action = self.gauge_action
+        computeGaugeForceQuda(
+            nullptr,
+            nullptr,
+            action.force_paths_ptr,
+            action.flengths_ptr,
+            action.fcoeffs_ptr,
+            action.num_fpaths,
+            action.max_length - 1,
+            dt,
+            self.gauge_param,
+        )
+        getResident().invalidate("momentum")
+
+    def gaugeAction(self) -> float:
+        action = self.gauge_action
+        traces = numpy.zeros((action.num_paths), "<c16")
+        computeGaugeLoopTraceQuda(
+            ndarrayDataPointer(traces),
+            action.paths_ptr,
+            action.lengths_ptr,
+            action.coeffs_ptr,
+            action.num_paths,
+            action.max_length,
+            1,
+        )
+        return traces.real.sum()
 
-    def reunitGaugeField(self, tol: float):
-        gauge = LatticeGauge(self.latt_info, None)
+    def reunitGaugeField(self, tol: float, gauge: LatticeGauge = None):
+        """
+        Project the resident links onto SU(3). With `gauge` the projected links are also saved into it and recorded
+        as resident, so loading `gauge` afterwards is skipped, and the links are not downloaded first if `gauge` is
+        already the resident field.
+        """
+        gauge = gauge if gauge is not None else LatticeGauge(self.latt_info, None)
         t_boundary = self.gauge_param.t_boundary
         reconstruct = self.gauge_param.reconstruct
-        self.saveGauge(gauge)
+        self._saveResidentGauge(gauge)
         self.gauge_param.t_boundary = QudaTboundary.QUDA_PERIODIC_T
         self.gauge_param.reconstruct = QudaReconstructType.QUDA_RECONSTRUCT_NO
         self.loadGauge(gauge)
         projectSU3Quda(nullptr, tol, self.gauge_param)
+        getResident().invalidate("links", "clover")
         self.saveGauge(gauge)
         self.gauge_param.t_boundary = t_boundary
         self.gauge_param.reconstruct = reconstruct
         self.loadGauge(gauge)
 
+    def _saveResidentGauge(self, gauge: LatticeGauge):
+        # The periodic upload in `reunitGaugeField` and `smearGauge` needs the links on the host.
+        if not getResident().isResident("links", gauge, ("hmc", gaugeState(self.gauge_param))):
+            self.saveGauge(gauge)
+
     def loadMom(self, mom: LatticeGauge):
         # make_resident_mom = self.gauge_param.make_resident_mom
         # return_result_mom = self.gauge_param.return_result_mom
         # self.gauge_param.make_resident_mom = 1
         # self.gauge_param.return_result_mom = 0
+        states = {"momentum": gaugeState(self.gauge_param)}
+        resident = getResident()
+        if resident.skip(mom, states):
+            return
         momResidentQuda(mom.data_ptrs, self.gauge_param)
+        resident.record(mom, states)
         # self.gauge_param.make_resident_mom = make_resident_mom
         # self.gauge_param.return_result_mom = return_result_mom
 
+    def saveMom(self, mom: LatticeGauge):
+        self.gauge_param.make_resident_mom = 0
+        self.gauge_param.return_result_mom = 1
+        momResidentQuda(mom.data_ptrs, self.gauge_param)
+        self.gauge_param.make_resident_mom = 1
+        self.gauge_param.return_result_mom = 0
+        mom.touch()
+        # Returning the momentum may release the resident one, so it is uploaded again.
+        getResident().invalidate("momentum")
+        self.loadMom(mom)
+
     def gaussMom(self, seed: int):
         gaussMomQuda(seed, 1.0)
+        getResident().invalidate("momentum")
 
     def actionMom(self) -> float:
         return momActionQuda(nullptr, self.gauge_param)
@@ -187,6 +274,7 @@ class HMC:
         if not self.updated_clover:
             freeCloverQuda()
             loadCloverQuda(nullptr, nullptr, self.invert_param)
+            getResident().invalidate("clover")
             self.updated_clover = True
 
     def initNoise(self, x: LatticeFermion, seed: int):
@@ -195,17 +283,38 @@ class HMC:
         MatQuda(x.odd_ptr, x.even_ptr, self.invert_param)
         self.invert_param.dagger = QudaDagType.QUDA_DAG_NO
 
-    def smearGauge(self):
+    def hasenbusch(self, mu: Sequence[float], tol: float = None, maxiter: int = None) -> List["HasenbuschMonomial"]:
+        """
+        Split the two-flavour determinant into the Hasenbusch chain with the twisted mass shifts `mu`
+
+            det(M^dag M) det(A_oo)^2 = det(M^dag M) / det(M^dag M + mu_1^2) * ...
+                                     * det(M^dag M + mu_{n-1}^2) / det(M^dag M + mu_n^2)
+                                     * det(M^dag M + mu_n^2) det(A_oo)^2,
+
+        lightest first. Pass the force of each monomial to the integrator of its own time scale.
+        """
+        shifts = [0.0] + sorted(mu)
+        monomials = [HasenbuschMonomial(self, shifts[i], shifts[i + 1], tol, maxiter) for i in range(len(mu))]
+        monomials.append(HasenbuschMonomial(self, shifts[-1], None, tol, maxiter))
+        return monomials
+
+    def smearGauge(self, gauge: LatticeGauge = None, smeared_gauge: LatticeGauge = None):
+        """
+        Replace the resident links with the smeared ones and return the thin links. With `smeared_gauge` the
+        smeared links are saved into it and recorded as resident, so loading `smeared_gauge` again is skipped, and
+        with `gauge` the thin links are saved into it, or not downloaded at all if `gauge` is the resident field.
+        """
         t_boundary = self.gauge_param.t_boundary
         reconstruct = self.gauge_param.reconstruct
         _type = self.gauge_param.type
-        gauge = LatticeGauge(self.latt_info, None)
-        smeared_gauge = LatticeGauge(self.latt_info, None)
-        self.saveGauge(gauge)
+        gauge = gauge if gauge is not None else LatticeGauge(self.latt_info, None)
+        smeared_gauge = smeared_gauge if smeared_gauge is not None else LatticeGauge(self.latt_info, None)
+        self._saveResidentGauge(gauge)
         self.gauge_param.t_boundary = QudaTboundary.QUDA_PERIODIC_T
         self.gauge_param.reconstruct = QudaReconstructType.QUDA_RECONSTRUCT_NO
         self.loadGauge(gauge)
         performGaugeSmearQuda(self.smear_param, self.obs_param)
+        getResident().invalidate("smeared")
         self.gauge_param.type = QudaLinkType.QUDA_SMEARED_LINKS
         self.saveGauge(smeared_gauge)
         self.gauge_param.type = _type
@@ -213,3 +322,257 @@ class HMC:
         self.gauge_param.reconstruct = reconstruct
         self.loadGauge(smeared_gauge)
         return gauge
+
+
+class HasenbuschMonomial:
+    """
+    A two-flavour pseudofermion of the even-odd preconditioned clover operator M of `hmc`, which is either the ratio
+    det(M^dag M + mu^2) / det(M^dag M + mu_heavy^2) with the action
+
+        S = phi^dag phi + (mu_heavy^2 - mu^2) phi^dag (M^dag M + mu^2)^-1 phi,
+
+    or, without `mu_heavy`, the heaviest det(M^dag M + mu^2) det(A_oo)^2 with S = phi^dag (M^dag M + mu^2)^-1 phi
+    - 2 tr log A_oo. Every monomial solves with its own copy of `hmc.invert_param`, so `tol` and `maxiter` can be
+    chosen per monomial without building another operator, and only the heaviest monomial carries the clover
+    determinant.
+
+    M is gamma5-hermitian, so W = M + i mu gamma5 has W^dag W = M^dag M + mu^2 and the heatbath is exact: phi =
+    W_mu^dag W_heavy (M^dag M + mu_heavy^2)^-1 eta for a ratio and phi = W_mu^dag eta for the heaviest.
+    """
+
+    def __init__(self, hmc: HMC, mu: float, mu_heavy: float = None, tol: float = None, maxiter: int = None) -> None:
+        tol = tol if tol is not None else hmc.tol
+        maxiter = maxiter if maxiter is not None else hmc.maxiter
+
+        self.hmc = hmc
+        self.mu = mu
+        self.mu_heavy = mu_heavy
+        # The operator, even-odd preconditioning and clover term of `hmc`, with its own solver settings.
+        self.invert_param: QudaInvertParam = hmc.invert_param.copy()
+        self.phi = LatticeFermion(hmc.latt_info)
+        self.tmp = LatticeFermion(hmc.latt_info)
+
+        self.invert_param.tol = tol
+        self.invert_param.maxiter = maxiter
+        self.invert_param.compute_action = 0
+        self.invert_param.compute_clover_trlog = 0
+        self.invert_param.num_offset = 1
+        self.invert_param.tol_offset = [tol] * QUDA_MAX_MULTI_SHIFT
+        self.invert_param.offset = [0.0] * QUDA_MAX_MULTI_SHIFT
+
+    def _solve(self, x, b, mu: float):
+        # x = (M^dag M + mu^2)^-1 b
+        self.invert_param.offset = [mu**2] + [0.0] * (QUDA_MAX_MULTI_SHIFT - 1)
+        invertMultiShiftQuda(
+            ndarrayDataPointer(x.reshape(1, -1), True), ndarrayDataPointer(b.reshape(-1), True), self.invert_param
+        )
+
+    def _twisted(self, x, b, mu: float, dagger: bool):
+        # x = (M + i mu gamma5) b, or its dagger, with gamma5 = diag(1, 1, -1, -1) in the DeGrand-Rossi basis
+        self.invert_param.dagger = QudaDagType.QUDA_DAG_YES if dagger else QudaDagType.QUDA_DAG_NO
+        MatQuda(ndarrayDataPointer(x.reshape(-1), True), ndarrayDataPointer(b.reshape(-1), True), self.invert_param)
+        self.invert_param.dagger = QudaDagType.QUDA_DAG_NO
+        if mu != 0.0:
+            imu = -1j * mu if dagger else 1j * mu
+            x[..., :2, :] += imu * b[..., :2, :]
+            x[..., 2:, :] -= imu * b[..., 2:, :]
+
+    def initNoise(self, noise: LatticeFermion):
+        """
+        Draw the pseudofermion from the gaussian noise in `noise.even`, which is left unchanged.
+        """
+        self.hmc.updateClover()
+        if self.mu_heavy is None:
+            self._twisted(self.phi.odd, noise.even, self.mu, True)
+        else:
+            self.tmp.even = noise.even
+            self._solve(self.tmp.odd, self.tmp.even, self.mu_heavy)
+            self._twisted(self.tmp.even, self.tmp.odd, self.mu_heavy, False)
+            self._twisted(self.phi.odd, self.tmp.even, self.mu, True)
+
+    def action(self) -> float:
+        self.hmc.updateClover()
+        phi, x = self.phi.odd, self.phi.even
+        self._solve(x, phi, self.mu)
+        phi_x = getMPIComm().allreduce(float((phi.conj() * x).sum().real))
+        if self.mu_heavy is None:
+            return phi_x - 2 * self.hmc.invert_param.trlogA[1]
+        phi_phi = getMPIComm().allreduce(float((phi.conj() * phi).sum().real))
+        return phi_phi + (self.mu_heavy**2 - self.mu**2) * phi_x
+
+    def force(self, dt: float):
+        """
+        Update the momentum with `dt` times the force of the monomial. The clover determinant, i.e. the sigma
+        trace term, is only added by the heaviest monomial.
+        """
+        hmc = self.hmc
+        hmc.updateClover()
+        self._solve(self.phi.even, self.phi.odd, self.mu)
+        if self.mu_heavy is None:
+            coeff, multiplicity = 1.0, 2
+        else:
+            coeff, multiplicity = self.mu_heavy**2 - self.mu**2, 0
+        kappa = self.invert_param.kappa
+        # Some conventions force the dagger to be YES here
+        self.invert_param.dagger = QudaDagType.QUDA_DAG_YES
+        computeCloverForceQuda(
+            nullptr,
+            dt,
+            ndarrayDataPointer(self.phi.even.reshape(1, -1), True),
+            nullptr,
+            ndarrayDataPointer(numpy.array([coeff], "<f8")),
+            -(kappa**2),
+            -self.invert_param.clover_coeff / 8,
+            1,
+            multiplicity,
+            nullptr,
+            hmc.gauge_param,
+            self.invert_param,
+        )
+        self.invert_param.dagger = QudaDagType.QUDA_DAG_NO
+        getResident().invalidate("momentum")
+
+
+class HMCState:
+    """
+    Save and restore the resident gauge field and momentum of `hmc`, as needed by `ForceGradient`.
+    """
+
+    def __init__(self, hmc: HMC) -> None:
+        self.hmc = hmc
+        self.gauge = LatticeGauge(hmc.latt_info)
+        self.mom = LatticeGauge(hmc.latt_info)
+        self.zero = LatticeGauge(hmc.latt_info)
+        self.zero.data[:] = 0
+
+    def savePosition(self):
+        self.hmc.saveGauge(self.gauge)
+
+    def restorePosition(self):
+        self.hmc.loadGauge(self.gauge)
+
+    def saveMomentum(self):
+        self.hmc.saveMom(self.mom)
+
+    def restoreMomentum(self):
+        self.hmc.loadMom(self.mom)
+
+    def zeroMomentum(self):
+        self.hmc.loadMom(self.zero)
+
+
+class Integrator(ABC):
+    """
+    Integrate the molecular dynamics over a trajectory of length `t` with `n_steps` steps of `step`.
+
+    Each force in `forces` is called as `force(dt)` and adds `dt` times the force of its monomial to the momentum.
+    `update(dt)` moves the gauge field by `dt` times the momentum, like `HMC.updateGaugeField`, or is another
+    `Integrator` running the monomials of a finer time scale over `dt` (Sexton-Weingarten nesting):
+
+        gauge = Omelyan4MN(4, [gauge_force], hmc.updateGaugeField)
+        fermion = Omelyan2MN(2, [fermion_force], gauge)
+        fermion(1.0)
+    """
+
+    def __init__(
+        self,
+        n_steps: int,
+        forces: Sequence[Callable[[float], None]],
+        update: Union[Callable[[float], None], "Integrator"],
+    ) -> None:
+        self.n_steps = n_steps
+        self.forces = forces
+        self.update = update
+
+    def __call__(self, t: float):
+        h = t / self.n_steps
+        for _ in range(self.n_steps):
+            self.step(h)
+
+    def force(self, dt: float):
+        for force in self.forces:
+            force(dt)
+
+    def shift(self) -> Callable[[float], None]:
+        """
+        The gauge field update of the finest time scale.
+        """
+        update = self.update
+        while isinstance(update, Integrator):
+            update = update.update
+        return update
+
+    @abstractmethod
+    def step(self, h: float):
+        pass
+
+
+class Leapfrog(Integrator):
+    def step(self, h: float):
+        self.force(h / 2)
+        self.update(h)
+        self.force(h / 2)
+
+
+class Omelyan2MN(Integrator):
+    lambda_ = 0.1931833275037836
+
+    def step(self, h: float):
+        self.force(self.lambda_ * h)
+        self.update(h / 2)
+        self.force((1 - 2 * self.lambda_) * h)
+        self.update(h / 2)
+        self.force(self.lambda_ * h)
+
+
+class Omelyan4MN(Integrator):
+    rho_ = 0.2539785108410595
+    theta_ = -0.03230286765269967
+    vartheta_ = 0.08398315262876693
+    lambda_ = 0.6822365335719091
+
+    def step(self, h: float):
+        self.force(self.vartheta_ * h)
+        self.update(self.rho_ * h)
+        self.force(self.lambda_ * h)
+        self.update(self.theta_ * h)
+        self.force((0.5 - (self.lambda_ + self.vartheta_)) * h)
+        self.update((1 - 2 * (self.theta_ + self.rho_)) * h)
+        self.force((0.5 - (self.lambda_ + self.vartheta_)) * h)
+        self.update(self.theta_ * h)
+        self.force(self.lambda_ * h)
+        self.update(self.rho_ * h)
+        self.force(self.vartheta_ * h)
+
+
+class ForceGradient(Integrator):
+    """
+    The fourth order force gradient integrator of Omelyan, Mryglod and Folk. The force gradient term of the middle
+    step is approximated by evaluating the force on a gauge field shifted by `h**2 / 24` times the force, which
+    needs `state` to save and restore the gauge field and momentum, see `HMCState`.
+    """
+
+    def __init__(
+        self,
+        n_steps: int,
+        forces: Sequence[Callable[[float], None]],
+        update: Union[Callable[[float], None], Integrator],
+        state,
+    ) -> None:
+        super().__init__(n_steps, forces, update)
+        self.state = state
+
+    def step(self, h: float):
+        state = self.state
+        self.force(h / 6)
+        self.update(h / 2)
+        state.saveMomentum()
+        state.savePosition()
+        state.zeroMomentum()
+        self.force(h**2 / 24)
+        self.shift()(1.0)
+        state.restoreMomentum()
+        self.force(2 * h / 3)
+        state.restorePosition()
+        self.update(h / 2)
+        self.force(h / 6)
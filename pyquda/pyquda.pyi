@@ -137,6 +137,7 @@ class QudaGaugeParam:
 class QudaInvertParam:
     def __init__(self) -> None: ...
     def __repr__(self) -> str: ...
+    def copy(self) -> QudaInvertParam: ...
 
     struct_size: size_t
     input_location: QudaFieldLocation
@@ -1203,6 +1204,25 @@ def computeGaugeFixingFFTQuda(
     """
     ...
 
+def flushChronoQuda(index: int) -> None:
+    """
+    Flush the chronological history for the given index
+
+    @param[in] index:
+        Index for which we are flushing
+    """
+    ...
+
+def setMPICommHandleQuda(mycomm: int) -> None:
+    """
+    Use the given MPI communicator in place of MPI_COMM_WORLD. This
+    should be called prior to initCommsGridQuda().
+
+    @param mycomm:
+        Address of the MPI_Comm handle, e.g. MPI._addressof(comm)
+    """
+    ...
+
 class QudaQuarkSmearParam:
     def __init__(self) -> None: ...
     # def __repr__(self) -> str: ...
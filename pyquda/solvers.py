@@ -0,0 +1,202 @@
+from typing import Callable, List, Tuple
+
+import numpy
+
+
+def getArrayNamespace(x):
+    """
+    The module providing `zeros_like` and `linalg` for `x`, which is numpy, cupy or torch.
+    """
+    if isinstance(x, numpy.ndarray):
+        return numpy
+    module = type(x).__module__.split(".")[0]
+    if module == "cupy":
+        import cupy
+
+        return cupy
+    elif module == "torch":
+        import torch
+
+        return torch
+    else:
+        raise ValueError(f"Unsupported array type {type(x)}")
+
+
+def _vdot(x, y):
+    return (x.conj() * y).sum()
+
+
+def _norm(x) -> float:
+    return float(abs(_vdot(x, x)) ** 0.5)
+
+
+class LinearOperator:
+    """
+    A linear operator acting on flat vectors. A block of vectors is stored row by row as a (k, n) array, so every
+    vector stays contiguous, and `__call__` applies `matvec` to each row unless a `block_matvec` is given.
+    """
+
+    def __init__(self, matvec: Callable, block_matvec: Callable = None) -> None:
+        self.matvec = matvec
+        self.block_matvec = block_matvec
+        self.count = 0
+
+    def __call__(self, x):
+        if x.ndim == 1:
+            self.count += 1
+            return self.matvec(x)
+        self.count += x.shape[0]
+        if self.block_matvec is not None:
+            return self.block_matvec(x)
+        xp = getArrayNamespace(x)
+        y = xp.zeros_like(x)
+        for i in range(x.shape[0]):
+            y[i] = self.matvec(x[i])
+        return y
+
+
+def diracOperator(dirac, dagger: bool = False, normal: bool = False) -> LinearOperator:
+    """
+    Wrap `Dirac.apply` as a `LinearOperator` on flat vectors of the fermion field of `dirac`.
+    """
+    from .field import LatticeFermion, LatticeStaggeredFermion
+    from .dirac.hisq import HISQ
+
+    field = LatticeStaggeredFermion if isinstance(dirac, HISQ) else LatticeFermion
+
+    def matvec(x):
+        return dirac.apply(field(dirac.latt_info, x), dagger, normal).data.reshape(-1)
+
+    return LinearOperator(matvec)
+
+
+def cg(A: LinearOperator, b, x0=None, tol: float = 1e-10, maxiter: int = 1000) -> Tuple[object, int]:
+    """
+    Conjugate gradient for a Hermitian positive definite `A`. Returns the solution and the number of iterations.
+    """
+    xp = getArrayNamespace(b)
+    x = xp.zeros_like(b) if x0 is None else x0 + 0
+    r = b - A(x) if x0 is not None else b + 0
+    p = r
+    rr = _vdot(r, r).real
+    b_norm = _norm(b)
+    for it in range(maxiter):
+        if float(rr) ** 0.5 <= tol * b_norm:
+            return x, it
+        q = A(p)
+        alpha = rr / _vdot(p, q).real
+        x = x + alpha * p
+        r = r - alpha * q
+        rr_new = _vdot(r, r).real
+        p = r + (rr_new / rr) * p
+        rr = rr_new
+    return x, maxiter
+
+
+def _orth(Z):
+    # An orthonormal basis of the rows of `Z`, without the directions lost to rounding.
+    xp = getArrayNamespace(Z)
+    _, S, Vh = xp.linalg.svd(Z, full_matrices=False)
+    rank = sum(1 for s in S if float(s) > float(S[0]) * len(S) * xp.finfo(S.dtype).eps)
+    return Vh[:rank]
+
+
+def blockCG(A: LinearOperator, B, X0=None, tol: float = 1e-10, maxiter: int = 1000) -> Tuple[object, int]:
+    """
+    Breakdown-free block conjugate gradient (Ji and Li) solving `A(X) = B` for the k right-hand sides stored as
+    the rows of `B`. The Krylov space is shared between the right-hand sides, so the iteration count goes down
+    with k. The search directions are orthonormalised every iteration and the dependent ones are dropped, so a
+    right-hand side that converges before the others does not make the block singular. Every right-hand side has
+    to reach `tol`.
+    """
+    xp = getArrayNamespace(B)
+    X = xp.zeros_like(B) if X0 is None else X0 + 0
+    R = B - A(X) if X0 is not None else B + 0
+    B_norm = [_norm(B[i]) for i in range(B.shape[0])]
+    P = _orth(R)
+    for it in range(maxiter):
+        if all(_norm(R[j]) <= tol * B_norm[j] for j in range(B.shape[0])) or P.shape[0] == 0:
+            return X, it
+        Q = A(P)
+        PQ = P.conj() @ Q.T
+        alpha = xp.linalg.solve(PQ, P.conj() @ R.T)
+        X = X + alpha.T @ P
+        R = R - alpha.T @ Q
+        beta = -xp.linalg.solve(PQ, Q.conj() @ R.T)
+        P = _orth(R + beta.T @ P)
+    return X, maxiter
+
+
+def bicgstab(A: LinearOperator, b, x0=None, tol: float = 1e-10, maxiter: int = 1000) -> Tuple[object, int]:
+    """
+    BiCGStab for a general `A`. Returns the solution and the number of iterations.
+    """
+    xp = getArrayNamespace(b)
+    x = xp.zeros_like(b) if x0 is None else x0 + 0
+    r = b - A(x) if x0 is not None else b + 0
+    r0 = r
+    p = r
+    rho = _vdot(r0, r)
+    b_norm = _norm(b)
+    for it in range(maxiter):
+        if _norm(r) <= tol * b_norm:
+            return x, it
+        v = A(p)
+        alpha = rho / _vdot(r0, v)
+        s = r - alpha * v
+        t = A(s)
+        omega = _vdot(t, s) / _vdot(t, t)
+        x = x + alpha * p + omega * s
+        r = s - omega * t
+        rho_new = _vdot(r0, r)
+        beta = (rho_new / rho) * (alpha / omega)
+        p = r + beta * (p - omega * v)
+        rho = rho_new
+    return x, maxiter
+
+
+def gcr(
+    A: LinearOperator, b, x0=None, tol: float = 1e-10, maxiter: int = 1000, nkrylov: int = 10
+) -> Tuple[object, int]:
+    """
+    GCR restarted every `nkrylov` iterations, for a general `A`. Returns the solution and the number of iterations.
+    """
+    xp = getArrayNamespace(b)
+    x = xp.zeros_like(b) if x0 is None else x0 + 0
+    r = b - A(x) if x0 is not None else b + 0
+    b_norm = _norm(b)
+    P: List = []
+    Q: List = []
+    for it in range(maxiter):
+        if _norm(r) <= tol * b_norm:
+            return x, it
+        if len(P) == nkrylov:
+            P, Q = [], []
+        p = r
+        q = A(p)
+        for p_j, q_j in zip(P, Q):
+            c = _vdot(q_j, q)
+            p = p - c * p_j
+            q = q - c * q_j
+        q_norm = _norm(q)
+        p = p / q_norm
+        q = q / q_norm
+        P.append(p)
+        Q.append(q)
+        a = _vdot(q, r)
+        x = x + a * p
+        r = r - a * q
+    return x, maxiter
+
+
+def solveBlock(solver: Callable, A: LinearOperator, B, X0=None, **kwargs) -> Tuple[object, List[int]]:
+    """
+    Solve every row of `B` separately with a single right-hand side `solver`, for comparison with `blockCG`.
+    """
+    xp = getArrayNamespace(B)
+    X = xp.zeros_like(B)
+    iters = []
+    for i in range(B.shape[0]):
+        X[i], iter_i = solver(A, B[i], None if X0 is None else X0[i], **kwargs)
+        iters.append(iter_i)
+    return X, iters
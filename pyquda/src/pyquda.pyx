@@ -390,6 +390,11 @@ cdef class QudaInvertParam:
     cdef from_ptr(self, quda.QudaInvertParam *ptr):
         self.param = cython.operator.dereference(ptr)
 
+    def copy(self):
+        cdef QudaInvertParam ret = QudaInvertParam()
+        ret.param = self.param
+        return ret
+
     @property
     def struct_size(self):
         return self.param.struct_size
@@ -3078,7 +3083,12 @@ def freeCloverQuda():
 def invertQuda(Pointer h_x, Pointer h_b, QudaInvertParam param):
     assert h_x.dtype == "void"
     assert h_b.dtype == "void"
-    quda.invertQuda(h_x.ptr, h_b.ptr, &param.param)
+    cdef void *x = h_x.ptr
+    cdef void *b = h_b.ptr
+    cdef quda.QudaInvertParam *p = &param.param
+    # Release the GIL so that other Python threads can run while the solver is working.
+    with nogil:
+        quda.invertQuda(x, b, p)
 
 # def invertMultiSrcQuda(Pointers _hp_x, Pointers _hp_b, QudaInvertParam param, Pointer h_gauge, QudaGaugeParam gauge_param)
 # def invertMultiSrcStaggeredQuda(Pointers _hp_x, Pointers _hp_b, QudaInvertParam param, Pointer milc_fatlinks, Pointer milc_longlinks, QudaGaugeParam gauge_param)
@@ -3245,11 +3255,15 @@ def computeGaugeFixingFFTQuda(Pointers gauge, unsigned int gauge_dir, unsigned i
 # void blasGEMMQuda(void *arrayA, void *arrayB, void *arrayC, QudaBoolean native, QudaBLASParam *param)
 # void blasLUInvQuda(void *Ainv, void *A, QudaBoolean use_native, QudaBLASParam *param)
 
-# void flushChronoQuda(int index)
+def flushChronoQuda(int index):
+    quda.flushChronoQuda(index)
 
 # void* newDeflationQuda(QudaEigParam *param)
 # void destroyDeflationQuda(void *df_instance)
 
+def setMPICommHandleQuda(size_t mycomm):
+    quda.setMPICommHandleQuda(<void *>mycomm)
+
 cdef class QudaQuarkSmearParam:
     cdef quda.QudaQuarkSmearParam param
 
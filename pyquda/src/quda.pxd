@@ -1168,7 +1168,7 @@ cdef extern from "quda.h":
     # @param param  Contains all metadata regarding host and device
     #               storage and solver parameters
     #
-    void invertQuda(void *h_x, void *h_b, QudaInvertParam *param)
+    void invertQuda(void *h_x, void *h_b, QudaInvertParam *param) nogil
 
     #
     # @brief Perform the solve like @invertQuda but for multiple rhs by spliting the comm grid into
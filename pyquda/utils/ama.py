@@ -0,0 +1,140 @@
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from ..field import Ns, Nc, LatticeFermion, LatticePropagator
+from ..dirac import Dirac
+from .source import source
+
+
+def schedule(n_source: int, n_exact: int) -> List[int]:
+    """
+    Indices of `n_exact` of `n_source` sources spread evenly, to be solved exactly as well.
+    """
+    return [i * n_source // n_exact for i in range(n_exact)]
+
+
+class AMA:
+    """
+    All-mode averaging. Every source is solved with the loose tolerance `sloppy_tol`, and the sources in `exact`
+    are solved again with the tolerance of `dslash`, starting from the sloppy solution. The correlators returned
+    by `contract(t_srce, propagator)` are combined with the bias corrected estimator
+
+        C = 1 / N sum_i C_sloppy(i) + 1 / N_exact sum_{j in exact} (C_exact(j) - C_sloppy(j)).
+
+    The sloppy solves use the same resident gauge field, so with a mixed precision profile almost all of their
+    iterations run in the sloppy precision.
+    """
+
+    def __init__(
+        self,
+        dslash: Dirac,
+        source_type: str,
+        sloppy_tol: float = 1e-4,
+        sloppy_maxiter: int = None,
+        source_phase=None,
+        rho: float = 0.0,
+        nsteps: int = 1,
+    ) -> None:
+        self.dslash = dslash
+        self.source_type = source_type
+        self.sloppy_tol = sloppy_tol
+        self.sloppy_maxiter = sloppy_maxiter
+        self.source_phase = source_phase
+        self.rho = rho
+        self.nsteps = nsteps
+        self.costs: List[Dict[str, Any]] = []
+
+    def _invert(self, t_srce: Union[int, List[int]], exact: bool, x0: LatticePropagator = None):
+        dslash = self.dslash
+        latt_info = dslash.latt_info
+        Vol = latt_info.volume
+        xi = dslash.gauge_param.anisotropy
+        invert_param = dslash.invert_param
+        tol, maxiter = invert_param.tol, invert_param.maxiter
+        if not exact:
+            invert_param.tol = self.sloppy_tol
+            if self.sloppy_maxiter is not None:
+                invert_param.maxiter = self.sloppy_maxiter
+
+        prop = LatticePropagator(latt_info)
+        data = prop.data.reshape(Vol, Ns, Ns, Nc, Nc)
+        secs, iters = 0.0, 0
+        s = perf_counter()
+        try:
+            for spin in range(Ns):
+                for color in range(Nc):
+                    b = source(
+                        latt_info.size,
+                        self.source_type,
+                        t_srce,
+                        spin,
+                        color,
+                        self.source_phase,
+                        self.rho,
+                        self.nsteps,
+                        xi,
+                    )
+                    if x0 is not None:
+                        x = LatticeFermion(latt_info)
+                        x.data.reshape(Vol, Ns, Nc)[:] = x0.data.reshape(Vol, Ns, Ns, Nc, Nc)[:, :, spin, :, color]
+                        x = dslash.invert(b, x)
+                    else:
+                        x = dslash.invert(b)
+                    data[:, :, spin, :, color] = x.data.reshape(Vol, Ns, Nc)
+                    secs += invert_param.secs
+                    iters += invert_param.iter
+        finally:
+            invert_param.tol, invert_param.maxiter = tol, maxiter
+        self.costs.append(
+            {
+                "t_srce": t_srce,
+                "exact": exact,
+                "iter": iters,
+                "solver_secs": secs,
+                "secs": perf_counter() - s,
+            }
+        )
+        return prop
+
+    def run(
+        self,
+        t_srce_list: Sequence[Union[int, List[int]]],
+        contract: Callable[[Any, LatticePropagator], Any],
+        exact: Sequence[int],
+    ):
+        """
+        Solve the sources in `t_srce_list` and return the AMA estimate of the correlator. `exact` holds the
+        indices into `t_srce_list` of the sources also solved exactly, see `schedule`. `contract` should return
+        an array, or anything supporting addition and division by a number.
+        """
+        if len(exact) == 0:
+            raise ValueError("AMA needs at least one exact solve for the bias correction")
+        exact = set(exact)
+        sloppy_sum = 0
+        correction_sum = 0
+        for i, t_srce in enumerate(t_srce_list):
+            prop = self._invert(t_srce, False)
+            corr = contract(t_srce, prop)
+            sloppy_sum = sloppy_sum + corr
+            if i in exact:
+                prop = self._invert(t_srce, True, prop)
+                correction_sum = correction_sum + (contract(t_srce, prop) - corr)
+        return sloppy_sum / len(t_srce_list) + correction_sum / len(exact)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        The number, iterations and seconds of the sloppy and exact propagator solves so far. `speedup` compares
+        the total time with solving every source exactly at the mean cost of the exact solves. The exact solves
+        start from the sloppy solution, so this underestimates the speedup.
+        """
+        ret = {}
+        for kind, exact in (("sloppy", False), ("exact", True)):
+            costs = [cost for cost in self.costs if cost["exact"] == exact]
+            count = len(costs)
+            ret[f"{kind}_count"] = count
+            ret[f"{kind}_mean_iter"] = sum(cost["iter"] for cost in costs) / count if count else 0.0
+            ret[f"{kind}_mean_secs"] = sum(cost["secs"] for cost in costs) / count if count else 0.0
+        total_secs = sum(cost["secs"] for cost in self.costs)
+        ret["total_secs"] = total_secs
+        ret["speedup"] = ret["sloppy_count"] * ret["exact_mean_secs"] / total_secs if total_secs > 0 else 0.0
+        return ret
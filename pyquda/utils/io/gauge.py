@@ -5,7 +5,9 @@ from xml.etree import ElementTree as ET
 
 import numpy
 
+from ... import getMPIRank
 from ...field import Ns, Nc, Nd, LatticeInfo, LatticeGauge, cb2
+from ...core import scatterLattice
 
 _precision_map = {"D": 8, "S": 4}
 
@@ -32,6 +34,16 @@ def fromMILCBuffer(buffer: bytes, dtype: str, latt_info: LatticeInfo):
     return fromILDGBuffer(buffer, dtype, latt_info)
 
 
+def fromILDGFile(filename: str, offset: int, dtype: str, latt_info: LatticeInfo):
+    """Only the root rank reads the file, and the blocks are scattered timeslice by timeslice."""
+    Lx, Ly, Lz, Lt = latt_info.global_size
+
+    gauge_raw = numpy.memmap(filename, dtype, "r", offset, (Lt, Lz, Ly, Lx, Nd, Nc, Nc)) if getMPIRank() == 0 else None
+    gauge_raw = scatterLattice(gauge_raw, [0, 1, 2, 3], pipeline=True).astype("<c16").transpose(4, 0, 1, 2, 3, 5, 6)
+
+    return LatticeGauge(latt_info, cb2(gauge_raw, [1, 2, 3, 4]))
+
+
 def readQIO(filename: str):
     with open(filename, "rb") as f:
         meta: Dict[str, Tuple[int]] = {}
@@ -54,8 +66,7 @@ def readQIO(filename: str):
         scidac_private_record_xml = ET.ElementTree(
             ET.fromstring(f.read(meta["scidac-private-record-xml"][1]).strip(b"\x00").decode("utf-8"))
         )
-        f.seek(meta["ildg-binary-data"][0])
-        ildg_binary_data = f.read(meta["ildg-binary-data"][1])
+        offset = meta["ildg-binary-data"][0]
     # tag = re.match(r"\{.*\}", ildg_format.getroot().tag).group(0)
     # precision = int(ildg_format.find(f"{tag}precision").text)
     precision = _precision_map[scidac_private_record_xml.find("precision").text]
@@ -77,15 +88,13 @@ def readQIO(filename: str):
     latt_size = map(int, scidac_private_file_xml.find("dims").text.split())
     latt_info = LatticeInfo(latt_size, 1, 1)
 
-    return fromILDGBuffer(ildg_binary_data, dtype, latt_info)
+    return fromILDGFile(filename, offset, dtype, latt_info)
 
 
 def readILDGBin(filename: str, dtype: str, latt_size: LatticeInfo):
-    with open(filename, "rb") as f:
-        ildg_binary_data = f.read()
     latt_info = LatticeInfo(latt_size)
 
-    return fromILDGBuffer(ildg_binary_data, dtype, latt_info)
+    return fromILDGFile(filename, 0, dtype, latt_info)
 
 
 def readMILC(filename: str):
@@ -96,8 +105,7 @@ def readMILC(filename: str):
         time_stamp = f.read(64).decode()
         assert struct.unpack("<i", f.read(4))[0] == 0
         sum29, sum31 = struct.unpack("<II", f.read(8))
-        # milc_binary_data = f.read(Lt * Lz * Ly * Lx * Nd * Nc * Nc * 2 * 4)
-        milc_binary_data = f.read()
+        offset = f.tell()
     latt_info = LatticeInfo(latt_size)
 
-    return fromMILCBuffer(milc_binary_data, "<c8", latt_info)
+    return fromILDGFile(filename, offset, "<c8", latt_info)
@@ -5,7 +5,9 @@ from xml.etree import ElementTree as ET
 
 import numpy
 
+from ... import getMPIRank
 from ...field import Ns, Nc, Nd, LatticeInfo, LatticePropagator, LatticeStaggeredPropagator, cb2
+from ...core import scatterLattice
 
 _precision_map = {"D": 8, "S": 4}
 
@@ -35,6 +37,24 @@ def fromSCIDACBuffer(buffer: bytes, dtype: str, latt_info: LatticeInfo, staggere
         return LatticeStaggeredPropagator(latt_info, cb2(propagator_raw, [0, 1, 2, 3]))
 
 
+def fromSCIDACFile(filename: str, offset: int, dtype: str, latt_info: LatticeInfo, staggered: bool):
+    """Only the root rank reads the file, and the blocks are scattered timeslice by timeslice."""
+    Lx, Ly, Lz, Lt = latt_info.global_size
+
+    if not staggered:
+        propagator_raw = (
+            numpy.memmap(filename, dtype, "r", offset, (Lt, Lz, Ly, Lx, Ns, Ns, Nc, Nc)) if getMPIRank() == 0 else None
+        )
+        propagator_raw = scatterLattice(propagator_raw, [0, 1, 2, 3], pipeline=True).astype("<c16")
+        return LatticePropagator(latt_info, cb2(propagator_raw, [0, 1, 2, 3]))
+    else:
+        propagator_raw = (
+            numpy.memmap(filename, dtype, "r", offset, (Lt, Lz, Ly, Lx, Nc, Nc)) if getMPIRank() == 0 else None
+        )
+        propagator_raw = scatterLattice(propagator_raw, [0, 1, 2, 3], pipeline=True).astype("<c16")
+        return LatticeStaggeredPropagator(latt_info, cb2(propagator_raw, [0, 1, 2, 3]))
+
+
 def readQIO(filename: str):
     with open(filename, "rb") as f:
         meta: Dict[str, Tuple[int]] = {}
@@ -55,8 +75,7 @@ def readQIO(filename: str):
         scidac_private_record_xml = ET.ElementTree(
             ET.fromstring(f.read(meta["scidac-private-record-xml"][1]).strip(b"\x00").decode("utf-8"))
         )
-        f.seek(meta["scidac-binary-data"][0])
-        scidac_binary_data = f.read(meta["scidac-binary-data"][1])
+        offset = meta["scidac-binary-data"][0]
     precision = _precision_map[scidac_private_record_xml.find("precision").text]
     assert int(scidac_private_record_xml.find("colors").text) == Nc
     assert int(scidac_private_record_xml.find("spins").text) == Ns
@@ -73,4 +92,4 @@ def readQIO(filename: str):
     latt_size = map(int, scidac_private_file_xml.find("dims").text.split())
     latt_info = LatticeInfo(latt_size, 1, 1)
 
-    return fromSCIDACBuffer(scidac_binary_data, dtype, latt_info, staggered)
+    return fromSCIDACFile(filename, offset, dtype, latt_info, staggered)
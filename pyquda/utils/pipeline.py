@@ -0,0 +1,79 @@
+from queue import Queue
+from threading import Semaphore, Thread
+from typing import Any, Callable, Iterable
+
+from .. import getGPUID, getCUDABackend
+
+
+def _synchronize():
+    backend = getCUDABackend()
+    if backend == "cupy":
+        import cupy
+
+        cupy.cuda.Stream.null.synchronize()
+    elif backend == "torch":
+        import torch
+
+        torch.cuda.default_stream().synchronize()
+
+
+def _contractWorker(contract: Callable[[Any, Any], None], queue: Queue, semaphore: Semaphore, errors: list):
+    backend = getCUDABackend()
+    if backend == "cupy":
+        import cupy
+
+        cupy.cuda.Device(getGPUID()).use()
+        stream = cupy.cuda.Stream(non_blocking=True)
+    elif backend == "torch":
+        import torch
+
+        torch.cuda.set_device(getGPUID())
+        stream = torch.cuda.Stream()
+
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        task, result = item
+        try:
+            if not errors:
+                with stream:
+                    contract(task, result)
+                stream.synchronize()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            del item, result
+            semaphore.release()
+
+
+def pipeline(solve: Callable[[Any], Any], contract: Callable[[Any, Any], None], tasks: Iterable, depth: int = 2):
+    """
+    Run `solve(task)` for every task on the calling thread and `contract(task, result)` on a worker thread with
+    its own CUDA stream, so the contraction of one result overlaps with the solve of the next.
+
+    At most `depth` results are alive at any time: the solve of a new task waits until the contraction of an
+    earlier one is finished. All QUDA calls stay on the calling thread, so `contract` should only do array
+    operations and must not call QUDA or MPI collectives. An exception raised by `contract` is re-raised here.
+    """
+    queue = Queue()
+    semaphore = Semaphore(depth)
+    errors = []
+    worker = Thread(target=_contractWorker, args=(contract, queue, semaphore, errors), daemon=True)
+    worker.start()
+    try:
+        for task in tasks:
+            semaphore.acquire()
+            if errors:
+                semaphore.release()
+                break
+            result = solve(task)
+            # The result is written on the default stream, make it visible to the worker stream.
+            _synchronize()
+            queue.put((task, result))
+            del result
+    finally:
+        queue.put(None)
+        worker.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,200 @@
+import os
+from time import perf_counter
+
+import numpy
+
+from .. import getMPISize
+from ..field import Ns, Nc, Nd, LatticeInfo, LatticeGauge, LatticeFermion, lexico, cb2
+
+# DeGrand-Rossi basis, the same as pyquda.utils.gamma
+_GAMMA = numpy.array(
+    [
+        [[0, 0, 0, 1j], [0, 0, 1j, 0], [0, -1j, 0, 0], [-1j, 0, 0, 0]],
+        [[0, 0, 0, -1], [0, 0, 1, 0], [0, 1, 0, 0], [-1, 0, 0, 0]],
+        [[0, 0, 1j, 0], [0, 0, 0, -1j], [-1j, 0, 0, 0], [0, 1j, 0, 0]],
+        [[0, 0, 1, 0], [0, 0, 0, 1], [1, 0, 0, 0], [0, 1, 0, 0]],
+    ],
+    "<c16",
+)
+_GAMMA_5 = _GAMMA[0] @ _GAMMA[1] @ _GAMMA[2] @ _GAMMA[3]
+
+# Flops per site counted the same way as QUDA.
+_DSLASH_FLOPS = 1320
+_CLOVER_FLOPS = 504
+_XPAY_FLOPS = 48
+
+
+def _neighbours(latt_info: LatticeInfo):
+    """
+    For each parity and direction, the index of the forward and backward neighbour of every site in the flattened
+    checkerboard of the other parity.
+    """
+    Lx, Ly, Lz, Lt = latt_info.size
+    Lxh = Lx // 2
+    t, z, y, xh = numpy.meshgrid(numpy.arange(Lt), numpy.arange(Lz), numpy.arange(Ly), numpy.arange(Lxh), indexing="ij")
+    fwd = numpy.zeros((2, Nd, Lt * Lz * Ly * Lxh), "<i8")
+    bwd = numpy.zeros((2, Nd, Lt * Lz * Ly * Lxh), "<i8")
+    for parity in range(2):
+        x = 2 * xh + (t + z + y + parity) % 2
+        for mu in range(Nd):
+            for shift, index in ((1, fwd), (-1, bwd)):
+                coord = [x, y, z, t]
+                coord[mu] = (coord[mu] + shift) % [Lx, Ly, Lz, Lt][mu]
+                x_, y_, z_, t_ = coord
+                index[parity, mu] = (((t_ * Lz + z_) * Ly + y_) * Lxh + x_ // 2).reshape(-1)
+    return fwd, bwd
+
+
+def _shift(data: numpy.ndarray, mu: int, shift: int):
+    # data[..., t, z, y, x, :, :] at x + shift * mu
+    return numpy.roll(data, -shift, axis=data.ndim - 3 - mu)
+
+
+def _fieldStrength(gauge_lexico: numpy.ndarray, mu: int, nu: int):
+    """
+    The traceless anti-Hermitian part of the four plaquettes in the mu-nu plane around every site.
+    """
+    U_mu, U_nu = gauge_lexico[mu], gauge_lexico[nu]
+
+    def dag(U):
+        return U.swapaxes(-1, -2).conj()
+
+    U_nu_xpmu = _shift(U_nu, mu, 1)
+    U_mu_xpnu = _shift(U_mu, nu, 1)
+    U_mu_xmmu = _shift(U_mu, mu, -1)
+    U_nu_xmmu = _shift(U_nu, mu, -1)
+    U_mu_xmmu_pnu = _shift(U_mu_xmmu, nu, 1)
+    U_mu_xmnu = _shift(U_mu, nu, -1)
+    U_nu_xmnu = _shift(U_nu, nu, -1)
+    U_mu_xmmu_mnu = _shift(U_mu_xmmu, nu, -1)
+    U_nu_xmmu_mnu = _shift(U_nu_xmmu, nu, -1)
+    U_nu_xpmu_mnu = _shift(U_nu_xpmu, nu, -1)
+    Q = (
+        U_mu @ U_nu_xpmu @ dag(U_mu_xpnu) @ dag(U_nu)
+        + U_nu @ dag(U_mu_xmmu_pnu) @ dag(U_nu_xmmu) @ U_mu_xmmu
+        + dag(U_mu_xmmu) @ dag(U_nu_xmmu_mnu) @ U_mu_xmmu_mnu @ U_nu_xmnu
+        + dag(U_nu_xmnu) @ U_mu_xmnu @ U_nu_xpmu_mnu @ dag(U_mu)
+    )
+    F = (Q - dag(Q)) / 8
+    F -= numpy.trace(F, axis1=-2, axis2=-1)[..., None, None] * numpy.identity(Nc) / Nc
+    return F
+
+
+class WilsonReference:
+    """
+    A NumPy implementation of the Wilson and clover Dirac operator on the cb2 layout for a single process, using
+    the conventions of `Wilson` and `CloverWilson`:
+
+        M = 1 / (2 kappa) (A - kappa D),
+        D = sum_mu (1 - gamma_mu) U_mu(x) delta(x + mu) + (1 + gamma_mu) U_mu^dagger(x - mu) delta(x - mu),
+        A = 1 - kappa clover_coeff sum_{mu < nu} gamma_mu gamma_nu F_mu_nu,
+
+    with the spatial links divided by the anisotropy (by `clover_xi` for the clover term) and the t links of the
+    last time slice multiplied by `t_boundary`. The hopping term gathers neighbours from the other checkerboard
+    with precomputed indices and applies the color matrices as batched 3x3 products.
+    """
+
+    def __init__(self, latt_info: LatticeInfo, kappa: float, clover_coeff: float = 0.0, clover_xi: float = 1.0):
+        if getMPISize() != 1:
+            raise RuntimeError("WilsonReference only works on a single process")
+        self.latt_info = latt_info
+        self.kappa = kappa
+        self.clover_coeff = clover_coeff
+        self.clover_xi = clover_xi
+        self.fwd, self.bwd = _neighbours(latt_info)
+        self.proj_minus = numpy.identity(Ns) - _GAMMA
+        self.proj_plus = numpy.identity(Ns) + _GAMMA
+        self.U_fwd = None
+        self.U_bwd = None
+        self.clover = None
+
+    def loadGauge(self, gauge: LatticeGauge):
+        latt_info = self.latt_info
+        Lx, Ly, Lz, Lt = latt_info.size
+        Vh = latt_info.volume_cb2
+        U = gauge.getHost().reshape(Nd, 2, Lt, Lz, Ly, Lx // 2, Nc, Nc)
+
+        if self.clover_coeff != 0.0:
+            U_clover = lexico(U, [1, 2, 3, 4, 5])
+            U_clover[: Nd - 1] /= self.clover_xi
+            clover = numpy.zeros((Lt, Lz, Ly, Lx, Ns, Nc, Ns, Nc), "<c16")
+            for mu in range(Nd):
+                for nu in range(mu + 1, Nd):
+                    sigma = _GAMMA[mu] @ _GAMMA[nu]
+                    clover -= numpy.einsum("rs,...ab->...rasb", sigma, _fieldStrength(U_clover, mu, nu))
+            clover *= self.kappa * self.clover_coeff
+            clover = cb2(clover.reshape(Lt, Lz, Ly, Lx, Ns * Nc * Ns * Nc), [0, 1, 2, 3])
+            self.clover = clover.reshape(2, Vh, Ns * Nc, Ns * Nc) + numpy.identity(Ns * Nc)
+        else:
+            self.clover = None
+
+        U = U.copy()
+        U[: Nd - 1] /= latt_info.anisotropy
+        if latt_info.gt == latt_info.Gt - 1:
+            U[Nd - 1, :, Lt - 1] *= latt_info.t_boundary
+        U = U.reshape(Nd, 2, Vh, Nc, Nc)
+        # U_mu(x)^T acting from the right on the color index of psi(x + mu), and U_mu(x - mu)^*.
+        self.U_fwd = numpy.ascontiguousarray(U.swapaxes(-1, -2))
+        self.U_bwd = numpy.empty_like(U)
+        for parity in range(2):
+            for mu in range(Nd):
+                self.U_bwd[mu, parity] = U[mu, 1 - parity, self.bwd[parity, mu]].conj()
+
+    def _hopping(self, psi: numpy.ndarray, parity: int):
+        # psi is the (Vh, Ns, Nc) checkerboard of parity 1 - parity
+        out = numpy.zeros_like(psi)
+        for mu in range(Nd):
+            out += self.proj_minus[mu] @ (psi[self.fwd[parity, mu]] @ self.U_fwd[mu, parity])
+            out += self.proj_plus[mu] @ (psi[self.bwd[parity, mu]] @ self.U_bwd[mu, parity])
+        return out
+
+    def _data(self, x: LatticeFermion):
+        return x.getHost().reshape(2, self.latt_info.volume_cb2, Ns, Nc)
+
+    def dslash(self, x: LatticeFermion, parity: int) -> LatticeFermion:
+        """
+        The hopping term D from the `1 - parity` checkerboard of `x` to the `parity` checkerboard of the result.
+        """
+        psi = self._data(x)
+        out = numpy.zeros_like(psi)
+        out[parity] = self._hopping(psi[1 - parity], parity)
+        return LatticeFermion(self.latt_info, out)
+
+    def applyClover(self, x: LatticeFermion) -> LatticeFermion:
+        psi = self._data(x)
+        if self.clover is None:
+            return LatticeFermion(self.latt_info, psi.copy())
+        shape = psi.shape
+        return LatticeFermion(self.latt_info, (self.clover @ psi.reshape(2, -1, Ns * Nc, 1)).reshape(shape))
+
+    def apply(self, x: LatticeFermion, dagger: bool = False) -> LatticeFermion:
+        psi = self._data(x)
+        if dagger:
+            psi = _GAMMA_5 @ psi
+        if self.clover is not None:
+            out = (self.clover @ psi.reshape(2, -1, Ns * Nc, 1)).reshape(psi.shape)
+        else:
+            out = psi.copy()
+        for parity in range(2):
+            out[parity] -= self.kappa * self._hopping(psi[1 - parity], parity)
+        out /= 2 * self.kappa
+        if dagger:
+            out = _GAMMA_5 @ out
+        return LatticeFermion(self.latt_info, out)
+
+    def flops(self) -> int:
+        flops = _DSLASH_FLOPS + _XPAY_FLOPS + (_CLOVER_FLOPS if self.clover is not None else 0)
+        return flops * self.latt_info.volume
+
+    def benchmark(self, x: LatticeFermion, n: int = 10):
+        """
+        Time `n` applications of the operator. Returns the seconds per application, the GFLOPS and the GFLOPS per
+        core available to this process.
+        """
+        self.apply(x)
+        s = perf_counter()
+        for _ in range(n):
+            self.apply(x)
+        secs = (perf_counter() - s) / n
+        gflops = self.flops() / secs / 1e9
+        return secs, gflops, gflops / len(os.sched_getaffinity(0))
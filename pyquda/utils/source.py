@@ -1,5 +1,7 @@
 from typing import List, Literal, Union
 
+import numpy
+
 from ..field import (
     Ns,
     Nc,
@@ -59,13 +61,39 @@ def momentum(latt_info: LatticeInfo, t_srce: int, spin: int, color: int, phase):
     return b
 
 
-def gaussian3(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int, rho: float, nsteps: int):
+_LAPLACE_POOL = None
+
+
+def _laplace(latt_size: List[int], rho: float = None, nsteps: int = None, xi: float = None):
     from .. import core
     from ..enum_quda import QudaDslashType
 
-    _b = point(latt_info, t_srce, None, color)
-    dslash = core.getDslash(latt_info.size, 0, 0, 0, anti_periodic_t=False)
+    if rho is None:
+        mass = 0
+    else:
+        # use mass to get specific kappa = -xi * rho**2 / 4 / nsteps
+        kappa = -(rho**2) / 4 / nsteps * xi
+        mass = 1 / (2 * kappa) - 4
+    dslash = core.getDslash(latt_size, mass, 0, 0, anti_periodic_t=False)
     dslash.invert_param.dslash_type = QudaDslashType.QUDA_LAPLACE_DSLASH
+    return dslash
+
+
+def _getLaplace(latt_size: List[int], *args):
+    # The Laplace operators of the smeared sources are kept apart from `getDiracPool`, and only the few used last.
+    global _LAPLACE_POOL
+    if _LAPLACE_POOL is None:
+        from ..dirac.pool import DiracPool
+
+        _LAPLACE_POOL = DiracPool(maxsize=4)
+    return _LAPLACE_POOL.get(_laplace, latt_size, *args)
+
+
+def gaussian3(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int, rho: float, nsteps: int):
+    from .. import core
+
+    _b = point(latt_info, t_srce, None, color)
+    dslash = _getLaplace(latt_info.size)
     alpha = 1 / (4 * nsteps / rho**2 - 6)
     core.quda.performWuppertalnStep(_b.data_ptr, _b.data_ptr, dslash.invert_param, nsteps, alpha)
 
@@ -80,7 +108,6 @@ def gaussian3(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int,
 
 def gaussian2(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int, rho: float, nsteps: int, xi: float):
     from .. import core
-    from ..enum_quda import QudaDslashType
 
     def _Laplacian(src, aux, sigma, invert_param):
         # aux = -kappa * Laplace * src + src
@@ -90,11 +117,7 @@ def gaussian2(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int,
     _b = point(latt_info, t_srce, None, color)
     _c = LatticeStaggeredFermion(latt_info)
 
-    # use mass to get specific kappa = -xi * rho**2 / 4 / nsteps
-    kappa = -(rho**2) / 4 / nsteps * xi
-    mass = 1 / (2 * kappa) - 4
-    dslash = core.getDslash(latt_info.size, mass, 0, 0, anti_periodic_t=False)
-    dslash.invert_param.dslash_type = QudaDslashType.QUDA_LAPLACE_DSLASH
+    dslash = _getLaplace(latt_info.size, rho, nsteps, xi)
     for _ in range(nsteps):
         # (rho**2 / 4) here aims to achieve the same result with Chroma
         _Laplacian(_b, _c, rho**2 / 4 / nsteps, dslash.invert_param)
@@ -111,7 +134,7 @@ def gaussian2(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int,
 
 def gaussian(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int, rho: float, nsteps: int, xi: float):
     from .. import core
-    from ..enum_quda import QudaDslashType, QudaParity
+    from ..enum_quda import QudaParity
 
     def _Laplacian(src, aux, sigma, xi, invert_param):
         aux.data[:] = 0
@@ -137,8 +160,7 @@ def gaussian(latt_info: LatticeInfo, t_srce: List[int], spin: int, color: int, r
         eo = ((x - gx * Lx) + (y - gy * Ly) + (z - gz * Lz) + (t - gt * Lt)) % 2
         _b.data[eo, t - gt * Lt, z - gz * Lz, y - gy * Ly, (x - gx * Lx) // 2, color] = 1
 
-    dslash = core.getDslash(latt_info.size, 0, 0, 0, anti_periodic_t=False)
-    dslash.invert_param.dslash_type = QudaDslashType.QUDA_LAPLACE_DSLASH
+    dslash = _getLaplace(latt_info.size)
     for _ in range(nsteps):
         # (rho**2 / 4) aims to achieve the same result with Chroma
         _Laplacian(_b, _c, rho**2 / 4 / nsteps, xi, dslash.invert_param)
@@ -163,6 +185,27 @@ def colorvector(latt_info: LatticeInfo, t_srce: int, phase):
     return b
 
 
+def noise(latt_info: LatticeInfo, seed: int, noise_type: Literal["z2", "z4"] = "z4", spin: bool = True):
+    """
+    A Z2 or Z4 noise vector on every site, spin and color. Each rank draws from its own stream of `seed`.
+    """
+    from .. import getMPIRank
+
+    rng = numpy.random.default_rng([seed, getMPIRank()])
+    Lx, Ly, Lz, Lt = latt_info.size
+    shape = (2, Lt, Lz, Ly, Lx // 2, Ns, Nc) if spin else (2, Lt, Lz, Ly, Lx // 2, Nc)
+    if noise_type.lower() == "z2":
+        data = (1 - 2 * rng.integers(0, 2, shape)).astype("<c16")
+    elif noise_type.lower() == "z4":
+        data = ((1 - 2 * rng.integers(0, 2, shape)) + 1j * (1 - 2 * rng.integers(0, 2, shape))) / 2**0.5
+    else:
+        raise NotImplementedError(f"{noise_type} noise is not implemented yet.")
+    b = LatticeFermion(latt_info, data) if spin else LatticeStaggeredFermion(latt_info, data)
+    b.toDevice()
+
+    return b
+
+
 def source(
     latt_size: List[int],
     source_type: str,
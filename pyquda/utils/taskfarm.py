@@ -0,0 +1,91 @@
+from typing import Any, Callable, List, Sequence
+
+import numpy
+from mpi4py import MPI
+
+from .. import getMPIComm, getGroupID, getGroupNum
+
+
+class TaskFarm:
+    """
+    Distribute independent tasks, e.g. (configuration, source) pairs, over the groups created by
+    `init(..., split=True)`, or over the groups given by `group_comm`, `group_id` and `group_num`, which need no
+    GPU.
+
+    Every group starts with a contiguous chunk of the tasks and takes them from the head. A group that runs
+    out of work steals from the tail of the group with the most tasks left. The queue state lives in an RMA
+    window on rank 0 of MPI.COMM_WORLD, so no rank has to act as a dedicated scheduler.
+    """
+
+    def __init__(
+        self, tasks: Sequence, group_comm: MPI.Comm = None, group_id: int = None, group_num: int = None
+    ) -> None:
+        self.tasks = tasks
+        self.group_comm = group_comm if group_comm is not None else getMPIComm()
+        self.world_comm = MPI.COMM_WORLD
+        self.group_id = group_id if group_id is not None else getGroupID()
+        self.group_num = group_num if group_num is not None else getGroupNum()
+        self.is_leader = self.group_comm.Get_rank() == 0
+        self.steals = 0
+
+    def _next(self, window: MPI.Win):
+        queue = numpy.empty((self.group_num, 2), "<i8")
+        window.Lock(0, MPI.LOCK_EXCLUSIVE)
+        window.Get(queue, 0)
+        window.Flush(0)
+        head, tail = queue[self.group_id]
+        if head < tail:
+            index = int(head)
+            queue[self.group_id, 0] += 1
+        else:
+            victim = int(numpy.argmax(queue[:, 1] - queue[:, 0]))
+            if queue[victim, 1] > queue[victim, 0]:
+                index = int(queue[victim, 1] - 1)
+                queue[victim, 1] -= 1
+                self.steals += 1
+            else:
+                index = -1
+        if index >= 0:
+            window.Put(queue, 0)
+        window.Unlock(0)
+        return index
+
+    def run(self, solve: Callable[[Any], Any]) -> List:
+        """
+        Call `solve(task)` collectively on every rank of a group for each task assigned to the group.
+
+        The value returned by `solve` on rank 0 of the group is kept, and the results are gathered in task order
+        on rank 0 of MPI.COMM_WORLD. Other ranks return None.
+        """
+        world_rank = self.world_comm.Get_rank()
+        task_num = len(self.tasks)
+        window = MPI.Win.Allocate(2 * self.group_num * 8 if world_rank == 0 else 0, 8, comm=self.world_comm)
+        if world_rank == 0:
+            queue = numpy.array(
+                [[task_num * i // self.group_num, task_num * (i + 1) // self.group_num] for i in range(self.group_num)],
+                "<i8",
+            )
+            window.Lock(0, MPI.LOCK_EXCLUSIVE)
+            window.Put(queue, 0)
+            window.Unlock(0)
+        self.world_comm.Barrier()
+
+        results = {}
+        while True:
+            index = self._next(window) if self.is_leader else None
+            index = self.group_comm.bcast(index, 0)
+            if index < 0:
+                break
+            result = solve(self.tasks[index])
+            if self.is_leader:
+                results[index] = result
+
+        window.Free()
+        results = self.world_comm.gather(results, 0)
+        if world_rank == 0:
+            merged = {}
+            for result in results:
+                merged.update(result)
+            return [merged[index] for index in range(task_num)]
+        else:
+            return None
@@ -0,0 +1,87 @@
+from typing import Any, Callable, Dict, List
+
+import numpy
+
+from ..field import LatticeFermion
+from ..dirac import Dirac
+
+
+class TSM:
+    """
+    Truncated solver method. The stochastic estimate of `estimate(eta, x)` with `x = M^-1 eta` is
+
+        E = 1 / N_t sum_{i} f(x_t(eta_i)) + 1 / N_e sum_{j} (f(x_e(eta_j)) - f(x_t(eta_j))),
+
+    where x_t is a solve cut off after `truncated_maxiter` iterations and x_e a solve to the tolerance of `dslash`,
+    and the two sums use independent noise vectors. The truncation only changes `invert_param.maxiter` between
+    the solves, and the exact solves start from the truncated solution of the same noise vector.
+    """
+
+    def __init__(self, dslash: Dirac, truncated_maxiter: int) -> None:
+        self.dslash = dslash
+        self.truncated_maxiter = truncated_maxiter
+        self.truncated_iter: List[int] = []
+        self.exact_iter: List[int] = []
+
+    def _invert(self, b: LatticeFermion, truncated: bool, x0: LatticeFermion = None):
+        invert_param = self.dslash.invert_param
+        maxiter = invert_param.maxiter
+        if truncated:
+            invert_param.maxiter = self.truncated_maxiter
+        try:
+            x = self.dslash.invert(b, x0)
+        finally:
+            invert_param.maxiter = maxiter
+        (self.truncated_iter if truncated else self.exact_iter).append(invert_param.iter)
+        return x
+
+    def run(
+        self,
+        noise: Callable[[int], LatticeFermion],
+        estimate: Callable[[LatticeFermion, LatticeFermion], Any],
+        n_truncated: int,
+        n_exact: int,
+    ):
+        """
+        Solve `n_exact` noise vectors both ways for the bias correction and `n_truncated` more with the truncated
+        solver only. `noise(i)` returns the i-th noise vector and `estimate(eta, x)` a number or a numpy array.
+
+        Returns the corrected estimate and its variance broken down into the truncated part, the correction and
+        their sum, together with the variance of the estimate from the exact solves alone for comparison.
+        """
+        if n_exact < 2 or n_truncated < 2:
+            raise ValueError("TSM needs at least two truncated and two exact solves to estimate the variance")
+        correction, exact = [], []
+        for i in range(n_exact):
+            eta = noise(i)
+            x = self._invert(eta, True)
+            f_truncated = numpy.asarray(estimate(eta, x))
+            x = self._invert(eta, False, x)
+            f_exact = numpy.asarray(estimate(eta, x))
+            exact.append(f_exact)
+            correction.append(f_exact - f_truncated)
+        truncated = []
+        for i in range(n_exact, n_exact + n_truncated):
+            eta = noise(i)
+            truncated.append(numpy.asarray(estimate(eta, self._invert(eta, True))))
+
+        truncated, correction, exact = numpy.array(truncated), numpy.array(correction), numpy.array(exact)
+        var_truncated = truncated.var(0, ddof=1) / n_truncated
+        var_correction = correction.var(0, ddof=1) / n_exact
+        variance: Dict[str, Any] = {
+            "truncated": var_truncated,
+            "correction": var_correction,
+            "total": var_truncated + var_correction,
+            "exact_only": exact.var(0, ddof=1) / n_exact,
+        }
+        return truncated.mean(0) + correction.mean(0), variance
+
+    def summary(self) -> Dict[str, float]:
+        """
+        The number and mean iterations of the truncated and exact solves so far.
+        """
+        ret = {}
+        for kind, iters in (("truncated", self.truncated_iter), ("exact", self.exact_iter)):
+            ret[f"{kind}_count"] = len(iters)
+            ret[f"{kind}_mean_iter"] = sum(iters) / len(iters) if iters else 0.0
+        return ret
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io
+from pyquda.utils.ama import AMA, schedule
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+Lx, Ly, Lz, Lt = latt_info.size
+Vol = latt_info.volume
+Nc, Ns, Nd = 3, 4, 4
+
+kappa = 0.115
+mass = 1 / (2 * kappa) - 4
+
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, multigrid=False)
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+dslash.loadGauge(gauge)
+
+
+def contract(t_srce, propagator):
+    tmp = cp.einsum(
+        "xijab,xijab->x",
+        propagator.data.reshape(Vol, Ns, Ns, Nc, Nc).conj(),
+        propagator.data.reshape(Vol, Ns, Ns, Nc, Nc),
+    )
+    return np.roll(tmp.reshape(2, Lt, Lz, Ly, Lx // 2).sum(axis=(0, 2, 3, 4)).get(), -t_srce)
+
+
+t_srce_list = list(range(Lt))
+twopt = sum(contract(t, core.invert(dslash, "wall", t)) for t in t_srce_list) / Lt
+
+ama = AMA(dslash, "wall", sloppy_tol=1e-4)
+twopt_ama = ama.run(t_srce_list, contract, schedule(len(t_srce_list), 2))
+print(ama.summary())
+# The bias correction from two exact solves leaves a residual bias of the order of the sloppy tolerance.
+assert np.abs(twopt_ama - twopt).max() / np.abs(twopt).max() < 1e-3
+
+# With every source solved exactly the estimator is the exact average.
+ama = AMA(dslash, "wall", sloppy_tol=1e-4)
+twopt_ama = ama.run(t_srce_list, contract, schedule(len(t_srce_list), len(t_srce_list)))
+assert np.abs(twopt_ama - twopt).max() / np.abs(twopt).max() < 1e-9
+
+dslash.destroy()
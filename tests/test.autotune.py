@@ -0,0 +1,45 @@
+import os
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io, source
+from pyquda.field import LatticeInfo
+from pyquda.dirac import autotune
+from pyquda.enum_quda import QudaPrecision
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+
+kappa = 0.115
+mass = 1 / (2 * kappa) - 4
+
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, multigrid=False)
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+dslash.loadGauge(gauge)
+
+b = source.point(latt_info, [0, 0, 0, 0], 0, 0)
+x_ref = dslash.invert(b)
+
+choice = dslash.autotune(b, gauge, retune=True)
+assert set(choice) >= {"inv_type", "solve_type"}, choice
+x = dslash.invert(b)
+# The tuned settings solve the same system to the same tolerance.
+assert cp.linalg.norm(x.data - x_ref.data) / cp.linalg.norm(x_ref.data) < 1e-10
+
+# The second call reads the stored choice without trial solves.
+assert dslash.autotune(b, gauge) == choice
+assert dslash.invert_param.cuda_prec_sloppy == choice["sloppy"]
+
+# Another sloppy precision cannot be applied without the gauge field to reload.
+half, single = QudaPrecision.QUDA_HALF_PRECISION, QudaPrecision.QUDA_SINGLE_PRECISION
+try:
+    autotune.apply(dslash, {**choice, "sloppy": int(single if choice["sloppy"] == half else half)})
+except ValueError:
+    pass
+else:
+    raise AssertionError("a sloppy precision was applied without the gauge field")
+
+dslash.destroy()
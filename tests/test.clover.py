@@ -5,7 +5,7 @@ import cupy as cp
 test_dir = os.path.dirname(os.path.abspath(__file__))
 # sys.path.insert(1, os.path.join(test_dir, ".."))
 from pyquda import core, init
-from pyquda.utils import io
+from pyquda.utils import io, source
 from pyquda.field import LatticeInfo
 
 os.environ["QUDA_RESOURCE_PATH"] = ".cache"
@@ -33,3 +33,14 @@ dslash.destroy()
 propagator_chroma = io.readQIOPropagator("pt_prop_1")
 propagator_chroma.toDevice()
 print(cp.linalg.norm(propagator.data - propagator_chroma.data))
+
+# With a matching anisotropy the clover term is built from the links uploaded with the reconstruction of the
+# precision profile, and gives the same solution as the unreconstructed links.
+b = source.point(latt_info, [0, 0, 0, 0], 0, 0)
+x = {}
+for precision in ["double", "double_single_12"]:
+    dirac = core.getDirac(latt_info, mass, 1e-12, 1000, 1.0, coeff, precision=precision)
+    dirac.loadGauge(gauge)
+    x[precision] = dirac.invert(b)
+    dirac.destroy()
+assert cp.linalg.norm(x["double_single_12"].data - x["double"].data) / cp.linalg.norm(x["double"].data) < 1e-9
@@ -0,0 +1,32 @@
+import os
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8], 1)
+
+mass = 0.0102
+
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+
+dslash = core.getStaggeredDirac(latt_info, mass, 1e-12, 1000, 1.0, 0.0)
+dslash.loadGauge(gauge)
+propagator = core.invertStaggered(dslash, "point", [0, 0, 0, 0])
+dslash.destroy()
+
+# The Kahler-Dirac level comes on top of the requested level.
+dslash_mg = core.getStaggeredDirac(latt_info, mass, 1e-12, 1000, 1.0, 0.0, [[1, 1, 1, 2]])
+assert dslash_mg.mg_param.n_level == 2
+dslash_mg.loadGauge(gauge)
+propagator_mg = core.invertStaggered(dslash_mg, "point", [0, 0, 0, 0])
+dslash_mg.destroy()
+
+diff = cp.linalg.norm(propagator_mg.data - propagator.data) / cp.linalg.norm(propagator.data)
+print(diff)
+assert diff < 1e-9
@@ -0,0 +1,137 @@
+import os
+import sys
+import numpy as np
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(1, os.path.join(test_dir, ".."))
+from pyquda import init
+from pyquda.hmc import HMC, Leapfrog, Omelyan4MN
+from pyquda.gauge_action import symanzik
+from pyquda.field import Ns, Nc, LatticeInfo, LatticeFermion, LatticeGauge
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+ensembles = {
+    "A1": ([16, 16, 16, 16], 5.789),
+    "B0": ([24, 24, 24, 24], 6),
+    "C2": ([32, 32, 32, 32], 6.179),
+    "D1": ([48, 48, 48, 48], 6.475),
+}
+
+tag = "A1"
+
+init()
+latt_info = LatticeInfo(ensembles[tag][0], -1)
+beta = ensembles[tag][1]
+Lx, Ly, Lz, Lt = latt_info.size
+
+gauge = LatticeGauge(latt_info, None)
+
+mass = 0.1
+csw = 1.0
+hmc = HMC(latt_info, mass, 1e-9, 1000, csw, True)
+hmc.loadGauge(gauge)
+hmc.loadMom(gauge)
+
+hmc.setGaugeAction(symanzik(beta))
+# det(M^dag M) / det(M^dag M + 0.1^2), det(M^dag M + 0.1^2) / det(M^dag M + 0.5^2), det(M^dag M + 0.5^2) det(A_oo)^2
+light, middle, heavy = hmc.hasenbusch([0.1, 0.5])
+
+
+def gaussianNoise():
+    phi = 2 * cp.pi * cp.random.random((2, Lt, Lz, Ly, Lx // 2, Ns, Nc))
+    r = cp.random.random((2, Lt, Lz, Ly, Lx // 2, Ns, Nc))
+    return LatticeFermion(latt_info, cp.sqrt(-cp.log(r)) * (cp.cos(phi) + 1j * cp.sin(phi)))
+
+
+def hamiltonian(monomials):
+    return hmc.actionMom() + hmc.gaugeAction() + sum(monomial.action() for monomial in monomials)
+
+
+plaquette = hmc.plaquette()
+print(f"\nplaquette = {plaquette}\n")
+
+monomials = [light, middle, heavy]
+
+# The heatbath is exact, so every monomial starts from the action eta^dag eta of its noise.
+cp.random.seed(0)
+for monomial in monomials:
+    noise = gaussianNoise()
+    monomial.initNoise(noise)
+    eta_eta = float(cp.vdot(noise.even, noise.even).real)
+    action = monomial.action()
+    if monomial.mu_heavy is None:
+        action += 2 * hmc.invert_param.trlogA[1]
+    assert abs(action - eta_eta) < 1e-6 * eta_eta
+
+# The chain and the single monomial it splits describe the same determinant, so both conserve the energy as dt -> 0.
+(single,) = hmc.hasenbusch([])
+for pseudofermions in [monomials, [single]]:
+    hmc.gaussMom(0)
+    for monomial in pseudofermions:
+        monomial.initNoise(gaussianNoise())
+    energy = hamiltonian(pseudofermions)
+    Leapfrog(1, [monomial.force for monomial in pseudofermions] + [hmc.gaugeForce], hmc.updateGaugeField)(1e-3)
+    assert abs(hamiltonian(pseudofermions) - energy) < 1e-2
+    hmc.loadGauge(gauge)
+
+t = 1.0
+dt = 0.2
+steps = round(t / dt)
+dt = t / steps
+warm = 20
+delta_energy = []
+
+# The light ratio has the smallest and most expensive force, so it is on the coarsest time scale.
+gauge_scale = Omelyan4MN(2, [hmc.gaugeForce], hmc.updateGaugeField)
+heavy_scale = Omelyan4MN(2, [heavy.force], gauge_scale)
+integrator = Omelyan4MN(steps, [light.force, middle.force], heavy_scale)
+for i in range(100):
+    hmc.gaussMom(i)
+
+    # Every pseudofermion needs its own noise.
+    cp.random.seed(i)
+    for monomial in monomials:
+        monomial.initNoise(gaussianNoise())
+
+    kinetic = hmc.actionMom()
+    potential = hmc.gaugeAction()
+    potential += sum(monomial.action() for monomial in monomials)
+    energy = kinetic + potential
+
+    integrator(t)
+
+    hmc.reunitGaugeField(1e-15)
+
+    kinetic1 = hmc.actionMom()
+    potential1 = hmc.gaugeAction()
+    potential1 += sum(monomial.action() for monomial in monomials)
+    energy1 = kinetic1 + potential1
+
+    accept = np.random.rand() < np.exp(energy - energy1)
+    if warm > 0:
+        warm -= 1
+    else:
+        assert abs(energy1 - energy) < 1.0
+        delta_energy.append(energy1 - energy)
+    if accept or warm:
+        hmc.saveGauge(gauge)
+    else:
+        hmc.loadGauge(gauge)
+
+    plaquette = hmc.plaquette()
+
+    print(
+        f"Step {i}:\n"
+        f"PE_old = {potential}, KE_old = {kinetic}\n"
+        f"PE = {potential1}, KE = {kinetic1}\n"
+        f"Delta_PE = {potential1 - potential}, Delta_KE = {kinetic1 - kinetic}\n"
+        f"Delta_E = {energy1 - energy}\n"
+        f"accept rate = {min(1, np.exp(energy - energy1))*100:.2f}%\n"
+        f"accept? {accept or not not warm}\n"
+        f"plaquette = {plaquette}\n"
+    )
+
+# Creutz equality <exp(-Delta_E)> = 1 of an area-preserving and reversible integrator.
+assert abs(np.mean(np.exp(-np.array(delta_energy))) - 1) < 0.2
@@ -0,0 +1,80 @@
+import numpy as np
+
+from pyquda.hmc import Leapfrog, Omelyan2MN, Omelyan4MN, ForceGradient
+
+# A stiff and a soft anharmonic oscillator stand in for the gauge and fermion monomials, so this runs on CPU only.
+
+
+class Oscillator:
+    def __init__(self) -> None:
+        self.q = np.array([1.0, 0.3])
+        self.p = np.array([0.2, -0.5])
+        self.stiff = np.array([[30.0, 1.0], [1.0, 20.0]])
+        self.soft = np.array([[1.0, 0.2], [0.2, 0.5]])
+        self.count = {"stiff": 0, "soft": 0}
+
+    def forceStiff(self, dt):
+        self.count["stiff"] += 1
+        self.p = self.p - dt * (self.stiff @ self.q)
+
+    def forceSoft(self, dt):
+        self.count["soft"] += 1
+        self.p = self.p - dt * (self.soft @ self.q + 0.3 * self.q**3)
+
+    def update(self, dt):
+        self.q = self.q + dt * self.p
+
+    def energy(self):
+        return self.p @ self.p / 2 + self.q @ (self.stiff + self.soft) @ self.q / 2 + 0.3 * (self.q**4).sum() / 4
+
+    def savePosition(self):
+        self.q_saved = self.q.copy()
+
+    def restorePosition(self):
+        self.q = self.q_saved
+
+    def saveMomentum(self):
+        self.p_saved = self.p.copy()
+
+    def restoreMomentum(self):
+        self.p = self.p_saved
+
+    def zeroMomentum(self):
+        self.p = np.zeros_like(self.p)
+
+
+def nested(scheme, n_steps, system: Oscillator):
+    def make(n, forces, update):
+        if scheme is ForceGradient:
+            return ForceGradient(n, forces, update, system)
+        return scheme(n, forces, update)
+
+    gauge = make(4, [system.forceStiff], system.update)
+    return make(n_steps, [system.forceSoft], gauge)
+
+
+for scheme, order in [(Leapfrog, 2), (Omelyan2MN, 2), (Omelyan4MN, 4), (ForceGradient, 4)]:
+    errors = []
+    for n_steps in [16, 32]:
+        system = Oscillator()
+        energy = system.energy()
+        nested(scheme, n_steps, system)(1.0)
+        errors.append(abs(system.energy() - energy))
+    measured = np.log2(errors[0] / errors[1])
+    print(f"{scheme.__name__}: dH = {errors}, order {measured:.2f}")
+    assert abs(measured - order) < 0.5
+
+    # Reversibility
+    system = Oscillator()
+    q, p = system.q.copy(), system.p.copy()
+    integrator = nested(scheme, 8, system)
+    integrator(1.0)
+    system.p = -system.p
+    integrator(1.0)
+    assert np.allclose(system.q, q) and np.allclose(-system.p, p)
+
+# The stiff force is evaluated four times as often as the soft one.
+system = Oscillator()
+nested(Leapfrog, 8, system)(1.0)
+print(system.count)
+assert system.count == {"stiff": 8 * 4 * 2, "soft": 8 * 2}
@@ -0,0 +1,33 @@
+import os
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import init
+from pyquda.utils import io
+from pyquda.dirac.pool import DiracPool, multigridBytes
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+
+pool = DiracPool()
+dirac = pool.getDirac(latt_info, 0.1, 1e-12, 1000, multigrid=[[2, 2, 2, 2]])
+pool.loadGauge(dirac, gauge)
+# Room for a single multigrid instance.
+pool.budget = multigridBytes(dirac)
+
+assert pool.getDirac(latt_info, 0.1, 1e-12, 1000, multigrid=[[2, 2, 2, 2]]) is dirac
+dirac_heavy = pool.getDirac(latt_info, 0.2, 1e-12, 1000, multigrid=[[2, 2, 2, 2]])
+pool.loadGauge(dirac_heavy, gauge)
+print(pool.stats())
+assert pool.stats()["evictions"] == 1 and dirac.mg_instance is None
+pool.clear()
+
+# Operators without multigrid take no budget, so only the count bounds them.
+pool = DiracPool(maxsize=2)
+diracs = [pool.getDirac(latt_info, mass, 1e-12, 1000) for mass in [0.1, 0.2, 0.3]]
+assert pool.stats()["size"] == 2 and pool.stats()["evictions"] == 1
+assert pool.getDirac(latt_info, 0.3, 1e-12, 1000) is diracs[2]
+pool.clear()
@@ -0,0 +1,50 @@
+import os
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io, source
+from pyquda.utils.reference import WilsonReference
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+
+xi_0, nu = 2.464, 0.95
+kappa = 0.115
+coeff = 1.17
+coeff_r, coeff_t = 0.91, 1.07
+
+mass = 1 / (2 * kappa) - 4
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+b = source.point(latt_info, [0, 0, 0, 0], 0, 0)
+
+# Wilson
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, multigrid=False)
+dslash.loadGauge(gauge)
+reference = WilsonReference(dslash.latt_info, kappa)
+reference.loadGauge(gauge)
+x = dslash.invert(b)
+for dagger in [False, True]:
+    y = dslash.apply(x, dagger).getHost()
+    y_ref = reference.apply(x, dagger).data
+    assert abs(y - y_ref).max() / abs(y_ref).max() < 1e-12
+dslash.destroy()
+
+# Clover, anisotropic
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, xi_0, nu, coeff_t, coeff_r, multigrid=False)
+dslash.loadGauge(gauge)
+xi = xi_0 / nu
+kappa = 1 / (2 * (mass + 1 + 3 / xi))
+reference = WilsonReference(dslash.latt_info, kappa, xi_0 * coeff_t**2 / coeff_r, (xi_0 * coeff_t / coeff_r) ** 0.5)
+reference.loadGauge(gauge)
+x = dslash.invert(b)
+for dagger in [False, True]:
+    y = dslash.apply(x, dagger).getHost()
+    y_ref = reference.apply(x, dagger).data
+    assert abs(y - y_ref).max() / abs(y_ref).max() < 1e-12
+dslash.destroy()
+
+secs, gflops, gflops_per_core = reference.benchmark(x)
+print(f"{secs:.3f} secs, {gflops:.3f} GFLOPS, {gflops_per_core:.3f} GFLOPS per core")
@@ -0,0 +1,59 @@
+import os
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io
+from pyquda.dirac.resident import getResident
+from pyquda.hmc import HMC
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+
+xi_0, nu = 2.464, 0.95
+kappa = 0.115
+coeff = 1.17
+coeff_r, coeff_t = 0.91, 1.07
+
+mass = 1 / (2 * kappa) - 4
+
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, xi_0, nu, coeff_t, coeff_r, multigrid=False)
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+
+dslash.loadGauge(gauge)
+propagator = core.invert(dslash, "point", [0, 0, 0, 0])
+dslash.loadGauge(gauge)
+assert getResident().report()["links"] == {"uploads": 1, "skipped": 1}
+
+# Modified in place, so it has to be uploaded again.
+gauge.data[:] = gauge.data.conj()
+gauge.touch()
+dslash.loadGauge(gauge)
+gauge.data[:] = gauge.data.conj()
+gauge.touch()
+dslash.loadGauge(gauge)
+assert getResident().report()["links"] == {"uploads": 3, "skipped": 1}
+
+# Assigning new data bumps the version as well.
+gauge.data = gauge.data.copy()
+dslash.loadGauge(gauge)
+assert getResident().report()["links"] == {"uploads": 4, "skipped": 1}
+dslash.loadGauge(gauge)
+assert getResident().report()["links"] == {"uploads": 4, "skipped": 2}
+
+propagator_reload = core.invert(dslash, "point", [0, 0, 0, 0])
+assert cp.linalg.norm(propagator_reload.data - propagator.data) < 1e-12 * cp.linalg.norm(propagator.data)
+
+dslash.destroy()
+
+# A reunitarize cycle: the projected links are saved into `gauge` with the state of `HMC.loadGauge`, so loading it
+# again is skipped, and the links are not downloaded first as `gauge` is resident.
+hmc = HMC(latt_info, mass, 1e-12, 1000)
+hmc.loadGauge(gauge)
+report = getResident().report()["links"]
+hmc.reunitGaugeField(1e-15, gauge)
+hmc.loadGauge(gauge)
+assert getResident().report()["links"] == {"uploads": report["uploads"] + 2, "skipped": report["skipped"] + 1}
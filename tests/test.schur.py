@@ -0,0 +1,37 @@
+import os
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io, source
+from pyquda.field import LatticeInfo, LatticeHalfFermion
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+
+xi_0, nu = 2.464, 0.95
+kappa = 0.115
+coeff = 1.17
+coeff_r, coeff_t = 0.91, 1.07
+
+mass = 1 / (2 * kappa) - 4
+
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+b = source.point(latt_info, [0, 0, 0, 0], 0, 0)
+
+for clover_coeff_t in [0.0, coeff_t]:
+    dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, xi_0, nu, clover_coeff_t, coeff_r, multigrid=False)
+    dslash.loadGauge(gauge)
+
+    x = dslash.invert(b)
+    dslash.solve_mode = "schur"
+    x_schur = dslash.invert(b)
+    dslash.solve_mode = "schur_odd"
+    x_odd = dslash.invert(b)
+    assert cp.linalg.norm(x_schur.data - x.data) / cp.linalg.norm(x.data) < 1e-9
+    assert type(x_odd) is LatticeHalfFermion and x_odd.parity == 1
+    assert cp.linalg.norm(x_odd.data - x.odd) / cp.linalg.norm(x.odd) < 1e-9
+
+    dslash.destroy()
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init, solvers
+from pyquda.utils import io, source
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+# The solvers only use the array namespace, so they are checked on CPU operators of known spectrum.
+rng = np.random.default_rng(0)
+n, k = 400, 6
+unitary, _ = np.linalg.qr(rng.normal(size=(n, n)) + 1j * rng.normal(size=(n, n)))
+# A few small eigenvalues slow down single right-hand side CG, the block Krylov space captures them at once.
+eigvals = np.concatenate([np.linspace(1e-3, 1e-2, k), np.linspace(1, 10, n - k)])
+hpd = (unitary * eigvals) @ unitary.conj().T
+A = solvers.LinearOperator(lambda x: hpd @ x)
+B = rng.normal(size=(k, n)) + 1j * rng.normal(size=(k, n))
+
+X, iters = solvers.solveBlock(solvers.cg, A, B, tol=1e-8, maxiter=5000)
+X_block, iter_block = solvers.blockCG(A, B, tol=1e-8, maxiter=5000)
+print(f"CG: {iters}, block CG: {iter_block}")
+assert iter_block < min(iters)
+assert np.linalg.norm(hpd @ X_block.T - B.T) <= 1e-7 * np.linalg.norm(B)
+assert np.linalg.norm(X_block - X) <= 1e-6 * np.linalg.norm(X)
+
+# An eigenvector converges after one iteration and a repeated right-hand side is dependent from the start, both of
+# which make the block singular unless the converged and dependent directions are dropped.
+B_early = B.copy()
+B_early[0] = unitary[:, k]
+B_early[2] = B_early[1]
+X_block, iter_block = solvers.blockCG(A, B_early, tol=1e-8, maxiter=5000)
+print(f"block CG with an early converged right-hand side: {iter_block}")
+assert iter_block < min(iters)
+for i in range(k):
+    assert np.linalg.norm(hpd @ X_block[i] - B_early[i]) <= 1e-7 * np.linalg.norm(B_early[i])
+
+general = hpd + 0.5j * np.identity(n) + 0.3 * rng.normal(size=(n, n)) / n**0.5
+A = solvers.LinearOperator(lambda x: general @ x)
+for solver in [solvers.bicgstab, solvers.gcr]:
+    x, iter = solver(A, B[0], tol=1e-8, maxiter=5000)
+    print(f"{solver.__name__}: {iter}")
+    assert iter < 5000
+    assert np.linalg.norm(general @ x - B[0]) <= 1e-7 * np.linalg.norm(B[0])
+
+# On the lattice the Krylov solvers have to agree with the QUDA solve of the same operator.
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+kappa = 0.115
+mass = 1 / (2 * kappa) - 4
+dirac = core.getDirac(latt_info, mass, 1e-12, 1000)
+dirac.loadGauge(io.readQIOGauge(os.path.join(test_dir, "weak_field.lime")))
+b = source.point(latt_info, [0, 0, 0, 0], 0, 0)
+x_ref = dirac.invert(b).data.reshape(-1)
+A = solvers.diracOperator(dirac)
+for solver in [solvers.bicgstab, solvers.gcr]:
+    x, iter = solver(A, b.data.reshape(-1), tol=1e-10, maxiter=1000)
+    print(f"{solver.__name__} on the lattice: {iter}")
+    assert iter < 1000
+    assert cp.linalg.norm(x - x_ref) <= 1e-8 * cp.linalg.norm(x_ref)
+dirac.destroy()
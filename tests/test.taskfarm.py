@@ -0,0 +1,30 @@
+from time import sleep, time
+
+from mpi4py import MPI
+
+from pyquda.utils.taskfarm import TaskFarm
+
+# Three groups of two ranks with a stub solver, on CPU only: mpirun -n 6 python tests/test.taskfarm.py
+world_rank = MPI.COMM_WORLD.Get_rank()
+group_num = MPI.COMM_WORLD.Get_size() // 2
+group_id = world_rank // 2
+group_comm = MPI.COMM_WORLD.Split(group_id, world_rank)
+assert group_comm.Get_size() == 2 and group_comm.Get_rank() == world_rank % 2
+
+tasks = [(cfg, t_srce) for cfg in range(4) for t_srce in range(0, 8, 2)]
+
+
+def solve(task):
+    cfg, t_srce = task
+    # Configurations of the first group are slow so the other groups have to steal work.
+    sleep(0.1 if cfg == 0 else 0.01)
+    return group_comm.allreduce(cfg * 100 + t_srce, MPI.MAX)
+
+
+s = time()
+farm = TaskFarm(tasks, group_comm, group_id, group_num)
+results = farm.run(solve)
+steals = MPI.COMM_WORLD.gather(farm.steals, 0)
+if world_rank == 0:
+    assert results == [cfg * 100 + t_srce for cfg, t_srce in tasks]
+    print(f"{len(tasks)} tasks on {farm.group_num} groups with {sum(steals)} steals: {time()-s:.2f}sec.")
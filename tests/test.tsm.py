@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import cupy as cp
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+from pyquda import core, init
+from pyquda.utils import io, source
+from pyquda.utils.tsm import TSM
+from pyquda.field import LatticeInfo
+
+os.environ["QUDA_RESOURCE_PATH"] = ".cache"
+
+init()
+latt_info = LatticeInfo([4, 4, 4, 8])
+
+kappa = 0.115
+mass = 1 / (2 * kappa) - 4
+
+dslash = core.getDslash(latt_info.size, mass, 1e-12, 1000, multigrid=False)
+gauge = io.readQIOGauge(os.path.join(test_dir, "weak_field.lime"))
+dslash.loadGauge(gauge)
+
+
+def noise(i):
+    return source.noise(latt_info, i, "z4")
+
+
+def estimate(eta, x):
+    # tr M^-1 / V, the chiral condensate up to normalization
+    return complex(cp.vdot(eta.data, x.data).get()) / latt_info.volume
+
+
+n_truncated, n_exact = 32, 4
+exact = np.array([estimate(noise(i), dslash.invert(noise(i))) for i in range(n_exact + n_truncated)])
+
+tsm = TSM(dslash, 10)
+value, variance = tsm.run(noise, estimate, n_truncated, n_exact)
+print(value, variance)
+print(tsm.summary())
+# The estimate is unbiased, so it agrees with the exact solves of the same noise vectors within the errors.
+assert abs(value - exact.mean()) < 5 * (variance["total"] + exact.var(ddof=1) / len(exact)) ** 0.5
+
+# Without truncation the corrections vanish and the estimate is the exact average over the truncated noise vectors.
+tsm = TSM(dslash, 1000)
+value, variance = tsm.run(noise, estimate, n_truncated, n_exact)
+assert abs(value - exact[n_exact:].mean()) < 1e-9 * abs(exact[n_exact:].mean())
+
+dslash.destroy()